@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,11 +42,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
+    'core.middleware.TenantMiddleware',
+    'core.middleware.ActivityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,11 +81,51 @@ WSGI_APPLICATION = 'config.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('FITNESS_DATABASE', BASE_DIR / 'db.sqlite3'),
     }
 }
 
 
+# Cache and sessions
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# https://docs.djangoproject.com/en/5.1/topics/http/sessions/#using-cached-sessions
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+# Sessions, cached users, login throttles, leaderboards, page fragments and
+# armed profiling sessions all assume every worker sees the same cache, so
+# the default is the file backend. locmem is per process and only suitable
+# for a single worker (or tests).
+CACHE_BACKEND = os.environ.get('FITNESS_CACHE', 'file')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('FITNESS_CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    }
+}
+
+# cached_db reads sessions from the cache and only falls back to the database
+# on a miss, so sessions survive a cache flush or worker restart. With a
+# per-process cache a logout in one worker would not reach the others, so
+# sessions then come straight from the database.
+SESSION_ENGINE = os.environ.get(
+    'FITNESS_SESSION_ENGINE',
+    'django.contrib.sessions.backends.db'
+    if CACHE_BACKEND == 'locmem'
+    else 'django.contrib.sessions.backends.cached_db',
+)
+
+# School used for hosts that do not match any School.domain (see core.tenancy).
+DEFAULT_SCHOOL_SLUG = 'default'
+
+# Seconds the resolved User/StudentProfile stay cached (see core.cache).
+AUTH_CACHE_TIMEOUT = 300
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -101,6 +145,104 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Group FitnessTestEntry inserts from concurrent submissions into shared
+# transactions on a writer thread (see core.ingest). Enable for test days.
+TEST_ENTRY_INGEST = {
+    'ENABLED': os.environ.get('FITNESS_COALESCE_WRITES') == '1',
+    'MAX_BATCH': 50,
+    'MAX_DELAY': 0.005,
+    'QUEUE_SIZE': 1000,
+    'SUBMIT_TIMEOUT': 5.0,
+}
+
+# Rows per leaderboard and how long a cached board may live (see core.leaderboards).
+LEADERBOARD_SIZE = 10
+LEADERBOARD_TIMEOUT = 600
+
+# Flag test values far from their section/age-band peers (see core.screening).
+# Sections are re-screened in the background DELAY seconds after a save.
+OUTLIER_SCREENING = {
+    'ENABLED': os.environ.get('FITNESS_SCREENING', '1') == '1',
+    'THRESHOLD': 3.5,
+    'MIN_GROUP_SIZE': 8,
+    'AGE_BAND': 2,
+    'DELAY': 2.0,
+}
+
+# Pre-rendered page fragments (section summaries, recent activity,
+# leaderboards, roster), re-rendered DELAY seconds after a change and expired
+# after TIMEOUT seconds (see core.fragments).
+FRAGMENT_CACHE = {
+    'ENABLED': True,
+    'DELAY': 1.0,
+    'TIMEOUT': 3600,
+    'RECENT_ACTIVITY': 10,
+    'LEADERBOARD_ROWS': 5,
+}
+
+# StudentProfile.last_update is buffered in memory and written at most
+# FLUSH_INTERVAL seconds after the activity (see core.activity).
+ACTIVITY_TRACKING = {
+    'ENABLED': True,
+    'FLUSH_INTERVAL': 60.0,
+}
+
+# Staff-triggered cProfile sessions for the next N matching requests
+# (see core.profiling); stored under PROFILE_DIR. With ENABLED off the
+# middleware is dropped from the stack.
+REQUEST_PROFILING = {
+    'ENABLED': os.environ.get('FITNESS_PROFILING', '1') == '1',
+    'POLL_INTERVAL': 1.0,
+    'MAX_REQUESTS': 100,
+}
+PROFILE_DIR = BASE_DIR / 'profiles'
+
+# Directory of the memory-mapped metric snapshot (see core.snapshot).
+METRIC_SNAPSHOT_DIR = BASE_DIR / 'snapshots'
+# Incremental builds re-read entries updated this many seconds before the
+# last build's watermark, to catch rows that committed late.
+METRIC_SNAPSHOT_OVERLAP = 300
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+# PBKDF2 iterations per profile; pick one with FITNESS_HASHER_PROFILE.
+# Existing hashes are upgraded/downgraded on the user's next login.
+
+PASSWORD_HASH_PROFILES = {
+    'strong': 1_000_000,
+    'balanced': 600_000,
+    'fast': 200_000,
+}
+
+PASSWORD_HASH_ITERATIONS = PASSWORD_HASH_PROFILES[
+    os.environ.get('FITNESS_HASHER_PROFILE', 'strong')
+]
+
+PASSWORD_HASHERS = [
+    'core.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# (max attempts, window in seconds) checked before any password hashing.
+# 'ip' counts every attempt, 'username' only failed ones (see core.throttle).
+# A whole class often signs in from behind one school NAT, so the per-IP
+# limit is sized for that; tune it with FITNESS_LOGIN_IP_LIMIT.
+LOGIN_THROTTLE_RATES = {
+    'ip': (int(os.environ.get('FITNESS_LOGIN_IP_LIMIT', '120')), 60),
+    'username': (5, 300),
+}
+
+# Behind a reverse proxy, the request.META header holding the client
+# address (e.g. 'HTTP_X_FORWARDED_FOR') and how many proxies append to it.
+# Unset, REMOTE_ADDR is used.
+LOGIN_THROTTLE_IP_HEADER = os.environ.get('FITNESS_LOGIN_IP_HEADER') or None
+LOGIN_THROTTLE_TRUSTED_PROXIES = int(os.environ.get('FITNESS_TRUSTED_PROXIES', '1'))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -118,6 +260,19 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# `manage.py collectstatic` minifies, content-hashes and pre-compresses
+# (gzip, plus brotli if installed) everything into STATIC_ROOT.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -14,9 +14,10 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path
-from core import views
+from django.urls import path, re_path
+from core import assets, views
 
 urlpatterns = [
     path("admin/", admin.site.urls),  # Django's built-in admin
@@ -28,11 +29,26 @@ urlpatterns = [
     path("class-analytics/", views.class_analytics, name="class_analytics"),
     path("pre-test-form/", views.pre_test_form, name="pre_test_form"),
     path("posttest/", views.post_test_entry, name="posttest"),
+    path("leaderboards/<str:metric>/", views.leaderboard, name="leaderboard"),
+    path("screening/flags/", views.outlier_flags, name="outlier_flags"),
     path("student-management/", views.student_management, name="student_management"),
     path("student-progress/", views.student_progress, name="student_progress"),
     path("update-profile/", views.update_profile, name="update_profile"),
     path("update-profile-posttest/", views.update_profile_posttest, name="update_profile_posttest"),
     path("view-student/", views.view_student, name="view_student"),
     path("custom-admin/", views.admin_page, name="admin_page"),
+    path("custom-admin/profiling/start/", views.profiling_start, name="profiling_start"),
+    path("custom-admin/profiling/stop/", views.profiling_stop, name="profiling_stop"),
+    path(
+        "custom-admin/profiling/<str:session_id>/download/",
+        views.profiling_download,
+        name="profiling_download",
+    ),
     path("login/", views.login_view, name="login"),  # your admin.html
 ]
+
+if not settings.DEBUG:
+    # runserver serves static files itself while DEBUG is on.
+    urlpatterns += [
+        re_path(r"^%s(?P<path>.*)$" % settings.STATIC_URL.lstrip("/"), assets.serve),
+    ]
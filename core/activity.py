@@ -0,0 +1,146 @@
+"""
+Buffered "last activity" tracking for StudentProfile.last_update.
+
+Writing the timestamp on every request would add a write transaction to
+each page view and compete for SQLite's single writer. Instead,
+record_activity() only stores the newest timestamp per profile in an
+in-process buffer. A daemon thread flushes the buffer FLUSH_INTERVAL
+seconds after the first unflushed activity, with one executemany() in a
+single transaction, so a stored value is at most about FLUSH_INTERVAL
+seconds stale. A failed flush (e.g. "database is locked") puts the
+timestamps back and retries after another FLUSH_INTERVAL, and a worker
+flushes its buffer when it exits normally; only a worker that is killed
+loses what it holds. The UPDATE never moves last_update backwards, so
+workers flushing out of order are harmless.
+
+After a flush only the roster fragments of the affected sections and of
+the school-wide scope are re-rendered (see core.fragments); the other
+fragments do not show last_update.
+"""
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .fragments import ROSTER_FRAGMENTS, schedule_render
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "FLUSH_INTERVAL": 60.0,
+}
+
+UPDATE_SQL = """
+    UPDATE core_studentprofile SET last_update = %s
+    WHERE id = %s AND (last_update IS NULL OR last_update < %s)
+"""
+
+
+def activity_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "ACTIVITY_TRACKING", {})}
+
+
+class ActivityBuffer:
+    def __init__(self, flush_interval=60.0):
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def record(self, profile_id, when=None):
+        when = when or timezone.now()
+        with self._lock:
+            previous = self._pending.get(profile_id)
+            if previous is None or when > previous:
+                self._pending[profile_id] = when
+            self._arm()
+
+    def _arm(self):
+        # Caller holds self._lock.
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_in_background)
+            self._timer.name = "activity-flush"
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _take(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            timer, self._timer = self._timer, None
+        return pending, timer
+
+    def _restore(self, pending):
+        """Put back timestamps that could not be written and retry later."""
+
+        with self._lock:
+            for profile_id, when in pending.items():
+                previous = self._pending.get(profile_id)
+                if previous is None or when > previous:
+                    self._pending[profile_id] = when
+            self._arm()
+
+    def _flush_in_background(self):
+        close_old_connections()
+        try:
+            self.flush(from_timer=True)
+        finally:
+            connection.close()
+
+    def flush(self, from_timer=False) -> int:
+        """Write the buffered timestamps now. Returns the number of profiles."""
+
+        pending, timer = self._take()
+        if timer is not None and not from_timer:
+            timer.cancel()
+        if not pending:
+            return 0
+
+        adapt = connection.ops.adapt_datetimefield_value
+        params = [(adapt(when), pk, adapt(when)) for pk, when in pending.items()]
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(UPDATE_SQL, params)
+                ids = list(pending)
+                sections = set()
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start:start + 500]
+                    cursor.execute(
+                        "SELECT DISTINCT school_id, section FROM core_studentprofile "
+                        f"WHERE id IN ({', '.join(['%s'] * len(chunk))})",
+                        chunk,
+                    )
+                    sections.update(cursor.fetchall())
+        except Exception:
+            logger.exception("Flushing last activity of %d profiles failed; will retry", len(pending))
+            self._restore(pending)
+            return 0
+
+        for school_id, section in sections:
+            schedule_render(school_id, section, ROSTER_FRAGMENTS)
+        return len(pending)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> ActivityBuffer:
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = ActivityBuffer(activity_settings()["FLUSH_INTERVAL"])
+            # Workers are recycled often; write what is buffered on the way out.
+            atexit.register(_buffer.flush)
+        return _buffer
+
+
+def record_activity(profile_id, when=None) -> None:
+    """Note that a student was active; written to the database later."""
+
+    if profile_id is not None and activity_settings()["ENABLED"]:
+        get_buffer().record(profile_id, when)
@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import StudentProfile, FitnessTestEntry, Remark
+from .models import School, StudentProfile, FitnessTestEntry, Remark, OutlierFlag
 
+admin.site.register(School)
 admin.site.register(StudentProfile)
 admin.site.register(FitnessTestEntry)
-admin.site.register(Remark)
\ No newline at end of file
+admin.site.register(Remark)
+admin.site.register(OutlierFlag)
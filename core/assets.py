@@ -0,0 +1,54 @@
+"""
+Serve collected static files with far-future caching.
+
+Meant for deployments without a front-end web server in front of the WSGI
+workers; otherwise point the web server at STATIC_ROOT with the same rules.
+Hashed names written by CompressedManifestStaticFilesStorage never change
+content, so they are cached as immutable, and pre-compressed variants are
+chosen from the request's Accept-Encoding.
+"""
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.\w+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@require_safe
+def serve(request, path):
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404("Invalid static file path.")
+    if not os.path.isfile(fullpath):
+        raise Http404("Static file not found.")
+
+    accepted = request.headers.get("Accept-Encoding", "")
+    served_path, encoding = fullpath, None
+    for name, suffix in ENCODINGS:
+        if name in accepted and os.path.isfile(fullpath + suffix):
+            served_path, encoding = fullpath + suffix, name
+            break
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    response = FileResponse(
+        open(served_path, "rb"), content_type=content_type or "application/octet-stream"
+    )
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    response["Cache-Control"] = (
+        IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.search(path) else DEFAULT_CACHE_CONTROL
+    )
+    return response
@@ -0,0 +1,131 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks run against a throwaway test database so they never touch real
+student data.
+"""
+
+import time
+from contextlib import contextmanager
+from statistics import median
+
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+BENCHMARK_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmarks"},
+}
+
+
+@contextmanager
+def benchmark_database(verbosity=0, test_name=None):
+    """
+    Create a test database for the duration of the block. Pass a file path as
+    ``test_name`` for benchmarks that use several threads (and connections).
+    """
+
+    if test_name:
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = test_name
+    setup_test_environment()
+    # A private in-process cache, so nothing cached for the real database
+    # (or an earlier run) leaks into the benchmark and vice versa.
+    cache_override = override_settings(CACHES=BENCHMARK_CACHES)
+    cache_override.enable()
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        flush_background_work()
+        connection.creation.destroy_test_db(old_name, verbosity)
+        cache_override.disable()
+        teardown_test_environment()
+
+
+def flush_background_work():
+    """Run pending background writes now, before the test database goes away."""
+
+    from . import fragments, screening
+    from .activity import get_buffer
+
+    get_buffer().flush()
+    screening.get_debouncer().flush()
+    fragments.get_debouncer().flush()
+
+
+def timed(func, repeat=1):
+    """Call ``func`` ``repeat`` times and return the list of durations in seconds."""
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(durations):
+    return {
+        "median_ms": median(durations) * 1000 if durations else 0.0,
+        "p99_ms": percentile(durations, 99) * 1000,
+    }
+
+
+def create_student(username, section="10-A", age=14, password="bench-pass-123", school=None):
+    from django.contrib.auth import get_user_model
+
+    from .models import StudentProfile
+    from .tenancy import get_default_school
+
+    user = get_user_model().objects.create_user(username=username, password=password)
+    profile = StudentProfile.objects.create(
+        user=user,
+        school=school or get_default_school(),
+        full_name=username.title(),
+        age=age,
+        section=section,
+    )
+    return user, profile
+
+
+def bulk_create_students(count, sections=10, ages=(12, 17), seed=0, school=None, prefix="student"):
+    """Create ``count`` students (without usable passwords) in a few queries."""
+
+    import random
+
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    from .models import StudentProfile
+    from .tenancy import get_default_school
+
+    school = school or get_default_school()
+    rng = random.Random(seed)
+    User = get_user_model()
+    password = make_password(None)
+    users = User.objects.bulk_create(
+        [User(username=f"{prefix}{i}", password=password) for i in range(count)],
+        batch_size=1000,
+    )
+    return StudentProfile.objects.bulk_create(
+        [
+            StudentProfile(
+                user=user,
+                school=school,
+                full_name=f"Student {i}",
+                age=rng.randint(*ages),
+                section=f"10-{i % sections}",
+            )
+            for i, user in enumerate(users)
+        ],
+        batch_size=1000,
+    )
@@ -0,0 +1,70 @@
+"""
+Cache keys and helpers for data that is read on almost every request.
+
+The authenticated user and their StudentProfile are cached per user id so a
+logged-in page view does not need to hit the database to resolve them.
+Entries are dropped by the signal handlers in core.signals whenever the
+underlying rows change.
+
+Keys for data that belongs to one school are built with tenant_key() so
+tenants never share (or clear) each other's entries. User and profile keys
+stay per user id: user ids are global, and the cached profile carries its
+school, which login and the school-scoped views check against request.school.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+AUTH_CACHE_TIMEOUT = getattr(settings, "AUTH_CACHE_TIMEOUT", 300)
+
+# Stored in place of a profile so users without one (e.g. staff) are cached too.
+_NO_PROFILE = "__none__"
+
+
+def tenant_key(school_id, *parts) -> str:
+    return ":".join(["core", "school", str(school_id), *map(str, parts)])
+
+
+def user_cache_key(user_id) -> str:
+    return f"core:user:{user_id}"
+
+
+def profile_cache_key(user_id) -> str:
+    return f"core:profile:{user_id}"
+
+
+def get_cached_user(user_id):
+    return cache.get(user_cache_key(user_id))
+
+
+def set_cached_user(user) -> None:
+    cache.set(user_cache_key(user.pk), user, AUTH_CACHE_TIMEOUT)
+
+
+def get_cached_profile(user):
+    """
+    Return the StudentProfile for ``user`` (or None), loading it into the
+    cache on a miss.
+    """
+    from .models import StudentProfile
+
+    key = profile_cache_key(user.pk)
+    profile = cache.get(key)
+    if profile is None:
+        profile = StudentProfile.objects.select_related("school").filter(user_id=user.pk).first()
+        cache.set(key, profile if profile is not None else _NO_PROFILE, AUTH_CACHE_TIMEOUT)
+    elif profile == _NO_PROFILE:
+        return None
+
+    if profile is not None:
+        # Reuse the request's user instead of letting the relation hit the DB.
+        profile.user = user
+    return profile
+
+
+def invalidate_user(user_id) -> None:
+    cache.delete_many([user_cache_key(user_id), profile_cache_key(user_id)])
+
+
+def invalidate_profile(user_id) -> None:
+    cache.delete(profile_cache_key(user_id))
@@ -0,0 +1,67 @@
+"""
+Debounced background work triggered from model signals.
+
+Receivers call ``Debouncer.schedule(key)`` for every change. Keys are
+collected once the surrounding transaction commits and handed to ``func``
+as one set on a daemon thread ``delay`` seconds after the first change of a
+burst, so a batch of saves costs one run instead of one per row.
+"""
+
+import logging
+import threading
+
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class Debouncer:
+    def __init__(self, func, delay, name):
+        self.func = func
+        self.delay = delay
+        self.name = name
+        self._pending = set()
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def schedule(self, key):
+        transaction.on_commit(lambda: self._add(key))
+
+    def _add(self, key):
+        with self._lock:
+            self._pending.add(key)
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self._fire)
+                self._timer.name = self.name
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _take(self):
+        with self._lock:
+            keys, self._pending = self._pending, set()
+            timer, self._timer = self._timer, None
+        return keys, timer
+
+    def _fire(self):
+        keys, _ = self._take()
+        close_old_connections()
+        try:
+            self._call(keys)
+        finally:
+            connection.close()
+
+    def _call(self, keys):
+        if not keys:
+            return
+        try:
+            self.func(keys)
+        except Exception:
+            logger.exception("%s failed for %d keys", self.name, len(keys))
+
+    def flush(self):
+        """Run the pending work now, in the calling thread."""
+
+        keys, timer = self._take()
+        if timer is not None:
+            timer.cancel()
+        self._call(keys)
@@ -1,9 +1,16 @@
+import re
+import time
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from .models import FitnessTestEntry, StudentProfile
+from . import throttle
+from .cache import get_cached_profile
+from .ingest import save_entry
+from .profiling import profiling_settings
+from .tenancy import get_default_school
 
 class StudentSignupForm(forms.Form):
     full_name = forms.CharField(
@@ -42,7 +49,7 @@ class StudentSignupForm(forms.Form):
             raise forms.ValidationError("Username already taken.")
         return username
 
-    def save(self):
+    def save(self, school=None):
         data = self.cleaned_data
 
         user = User.objects.create_user(
@@ -52,6 +59,7 @@ class StudentSignupForm(forms.Form):
 
         profile = StudentProfile.objects.create(
             user=user,
+            school=school or get_default_school(),
             full_name=data["full_name"],
             age=data["age"],
             section=data["section"],
@@ -67,15 +75,42 @@ class StudentLoginForm(forms.Form):
         widget=forms.PasswordInput(attrs={"placeholder": "Password"})
     )
 
+    def __init__(self, *args, request=None, **kwargs):
+        self.request = request
+        super().__init__(*args, **kwargs)
+
     def clean(self):
         cleaned_data = super().clean()
         username = cleaned_data.get("username")
         password = cleaned_data.get("password")
 
         if username and password:
-            user = authenticate(username=username, password=password)
+            # Everything before authenticate() is cheap; bail out early so
+            # throttled or unknown logins never reach the password hasher.
+            wait = throttle.check_login_allowed(self.request, username)
+            if wait:
+                raise forms.ValidationError(
+                    "Too many login attempts. Try again in %(seconds)s seconds.",
+                    params={"seconds": wait},
+                )
+            if throttle.reject_if_unknown_username(username):
+                # Count it like a real failure so the username throttle
+                # does not reveal which usernames exist.
+                throttle.login_failed(username)
+                raise forms.ValidationError("Invalid username or password.")
+
+            started = time.perf_counter()
+            user = authenticate(self.request, username=username, password=password)
             if user is None:
+                throttle.login_failed(username)
+                if not User.objects.filter(username=username).exists():
+                    throttle.remember_unknown_username(username, time.perf_counter() - started)
                 raise forms.ValidationError("Invalid username or password.")
+            profile = get_cached_profile(user)
+            if profile is not None and self.request is not None and profile.school_id != self.request.school.pk:
+                # Students may only sign in on their own school's host.
+                raise forms.ValidationError("This account belongs to another school.")
+            throttle.login_succeeded(username)
             cleaned_data["user"] = user
 
         return cleaned_data
@@ -166,8 +201,9 @@ class BaseTestForm(forms.Form):
     def save(self, student: StudentProfile) -> FitnessTestEntry:
         data = self.cleaned_data
 
-        return FitnessTestEntry.objects.create(
+        entry = FitnessTestEntry(
             student=student,
+            school_id=student.school_id,
             test_type=self.test_type,
             bmi=data["bmi"],
             vo2_max=data["vo2_max"],
@@ -177,6 +213,7 @@ class BaseTestForm(forms.Form):
             speed=data["speed"],
             endurance=data["endurance"],
         )
+        return save_entry(entry)
 
 
 class PreTestForm(BaseTestForm):
@@ -185,3 +222,26 @@ class PreTestForm(BaseTestForm):
 
 class PostTestForm(BaseTestForm):
     test_type = FitnessTestEntry.POSTTEST
+
+
+class ProfilingForm(forms.Form):
+    pattern = forms.CharField(
+        max_length=200,
+        widget=forms.TextInput(attrs={
+            "placeholder": "URL pattern (e.g. ^/student-progress/)",
+        })
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["requests"] = forms.IntegerField(
+            min_value=1, max_value=profiling_settings()["MAX_REQUESTS"], initial=20
+        )
+
+    def clean_pattern(self):
+        pattern = self.cleaned_data["pattern"]
+        try:
+            re.compile(pattern)
+        except re.error as exc:
+            raise forms.ValidationError(f"Invalid pattern: {exc}")
+        return pattern
@@ -0,0 +1,314 @@
+"""
+Pre-rendered HTML fragments shared by the class analytics and roster
+pages.
+
+Blocks such as section summaries, recent activity and leaderboards need
+aggregate queries. Instead of running them per page view, each fragment is
+rendered for a (school, section) scope and stored in the cache; views only
+read the HTML. ``section=None`` is the school-wide ("All sections") scope.
+
+When a FitnessTestEntry, Remark or StudentProfile changes, core.signals
+schedules the affected sections and a debounced background worker
+(core.debounce) re-renders their fragments plus the school-wide ones and
+overwrites the cached HTML; flushes of buffered activity (core.activity)
+only re-render the rosters. Until the worker runs (DELAY seconds after the
+first change of a burst) pages keep showing the previous rendering. A
+fragment that is not cached at all (cold cache, eviction) is rendered on
+the spot and stored. Cached HTML expires after TIMEOUT seconds so changes
+that sent no signal show up eventually.
+"""
+
+from datetime import timezone as dt_timezone
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.safestring import mark_safe
+
+from .cache import tenant_key
+from .debounce import Debouncer
+from .leaderboards import LATEST_ENTRY_SQL, LEADERBOARD_METRICS, get_leaderboard
+from .models import Remark, StudentProfile
+
+DEFAULTS = {
+    "ENABLED": True,
+    "DELAY": 1.0,
+    # Safety net for changes that send no signal (queryset update(), a
+    # worker exiting before its debounce timer fires).
+    "TIMEOUT": 3600,
+    "RECENT_ACTIVITY": 10,
+    "LEADERBOARD_ROWS": 5,
+}
+
+ALL_SECTIONS = None
+
+SUMMARY_METRICS = ("bmi", "vo2_max", "flexibility", "strength", "endurance")
+
+METRIC_LABELS = {
+    "bmi": "BMI",
+    "vo2_max": "VO₂ Max",
+    "flexibility": "Flexibility",
+    "strength": "Strength",
+    "endurance": "Endurance",
+    "agility": "Agility",
+    "speed": "Speed",
+}
+
+
+def fragment_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "FRAGMENT_CACHE", {})}
+
+
+def fragment_key(name: str, school_id, section=ALL_SECTIONS) -> str:
+    scope = "all" if section is ALL_SECTIONS else f"section:{section}"
+    return tenant_key(school_id, "fragment", name, scope)
+
+
+def _valid(column: str) -> str:
+    return f"CASE WHEN typeof({column}) IN ('integer', 'real') THEN {column} END"
+
+
+def _datetime(value):
+    # Raw SQLite rows hold datetimes as UTC text.
+    parsed = parse_datetime(value) if isinstance(value, str) else value
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def _section_filter(section, column="p.section"):
+    if section is ALL_SECTIONS:
+        return "", []
+    return f" AND {column} = %s", [section]
+
+
+def section_summary(school_id, section=ALL_SECTIONS) -> dict:
+    """Students and pre/post averages per section."""
+
+    where, params = _section_filter(section, "section")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT section, COUNT(*) FROM core_studentprofile WHERE school_id = %s{where} "
+            "GROUP BY section ORDER BY section",
+            [school_id, *params],
+        )
+        rows = {
+            name: {"section": name, "students": count, "tested": 0, "pre": {}, "post": {}}
+            for name, count in cursor.fetchall()
+        }
+
+        where, params = _section_filter(section)
+        averages = ", ".join(f"AVG({_valid('e.' + metric)})" for metric in SUMMARY_METRICS)
+        cursor.execute(
+            f"""
+            SELECT p.section, e.test_type, COUNT(DISTINCT e.student_id), {averages}
+            FROM core_fitnesstestentry e
+            JOIN core_studentprofile p ON p.id = e.student_id
+            WHERE e.school_id = %s{where}
+            GROUP BY p.section, e.test_type
+            """,
+            [school_id, *params],
+        )
+        for name, test_type, tested, *values in cursor.fetchall():
+            row = rows.get(name)
+            if row is None or test_type not in ("pre", "post"):
+                continue
+            row["tested"] = max(row["tested"], tested)
+            row[test_type] = dict(zip(SUMMARY_METRICS, values))
+
+    for row in rows.values():
+        row["metrics"] = [
+            (row["pre"].get(metric), row["post"].get(metric)) for metric in SUMMARY_METRICS
+        ]
+    return {
+        "sections": list(rows.values()),
+        "labels": [METRIC_LABELS[metric] for metric in SUMMARY_METRICS],
+    }
+
+
+def recent_activity(school_id, section=ALL_SECTIONS) -> dict:
+    """
+    Latest test entries and remarks. The remarks are about individual
+    students, so only staff pages show this fragment.
+    """
+
+    limit = fragment_settings()["RECENT_ACTIVITY"]
+    where, params = _section_filter(section)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT p.full_name, p.section, e.test_type, e.created_at
+            FROM core_fitnesstestentry e
+            JOIN core_studentprofile p ON p.id = e.student_id
+            WHERE e.school_id = %s{where}
+            ORDER BY e.created_at DESC
+            LIMIT %s
+            """,
+            [school_id, *params, limit],
+        )
+        entries = [
+            {"name": name, "section": student_section, "test_type": test_type,
+             "created_at": _datetime(created_at)}
+            for name, student_section, test_type, created_at in cursor.fetchall()
+        ]
+
+    remarks = Remark.objects.filter(student__school_id=school_id).select_related("student", "author")
+    if section is not ALL_SECTIONS:
+        remarks = remarks.filter(student__section=section)
+    return {"entries": entries, "remarks": list(remarks[:limit])}
+
+
+def leaderboards(school_id, section=ALL_SECTIONS) -> dict:
+    size = fragment_settings()["LEADERBOARD_ROWS"]
+    return {
+        "boards": [
+            {"label": METRIC_LABELS[metric], "order": order, "rows": get_leaderboard(metric, school_id, section)[:size]}
+            for metric, order in LEADERBOARD_METRICS.items()
+        ]
+    }
+
+
+ROSTER_ORDER = {
+    "name": "p.full_name, p.id",
+    # Served by profile_school_activity_idx for the school-wide roster.
+    "last_update": "p.last_update DESC, p.id",
+}
+
+
+def roster(school_id, section=ALL_SECTIONS, order="name") -> dict:
+    """One row per student with their latest BMI and VO2 max."""
+
+    where, params = _section_filter(section)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT p.id, p.full_name, p.section, {_valid("e.bmi")}, {_valid("e.vo2_max")},
+                   p.last_update
+            FROM core_studentprofile p
+            LEFT JOIN core_fitnesstestentry e ON e.student_id = p.id AND {LATEST_ENTRY_SQL}
+            WHERE p.school_id = %s{where}
+            ORDER BY {ROSTER_ORDER[order]}
+            """,
+            [school_id, *params],
+        )
+        students = [
+            {"id": pk, "name": name, "section": student_section, "bmi": bmi,
+             "vo2_max": vo2_max, "last_update": _datetime(last_update)}
+            for pk, name, student_section, bmi, vo2_max, last_update in cursor.fetchall()
+        ]
+    return {"students": students}
+
+
+def section_options(school_id, section=ALL_SECTIONS) -> dict:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT DISTINCT section FROM core_studentprofile WHERE school_id = %s ORDER BY section",
+            [school_id],
+        )
+        return {"sections": [name for (name,) in cursor.fetchall()]}
+
+
+# name -> (template, context builder)
+FRAGMENTS = {
+    "section_summary": ("fragments/section_summary.html", section_summary),
+    "recent_activity": ("fragments/recent_activity.html", recent_activity),
+    "leaderboards": ("fragments/leaderboards.html", leaderboards),
+    "roster": ("fragments/roster.html", roster),
+    "roster_by_activity": ("fragments/roster.html", partial(roster, order="last_update")),
+}
+
+# Fragments that only exist school-wide.
+SCHOOL_FRAGMENTS = {
+    "section_options": ("fragments/section_options.html", section_options),
+}
+
+
+def _definition(name):
+    return FRAGMENTS.get(name) or SCHOOL_FRAGMENTS[name]
+
+
+def _render(name: str, school_id, section=ALL_SECTIONS) -> str:
+    template, build_context = _definition(name)
+    return render_to_string(template, {"section": section, **build_context(school_id, section)})
+
+
+def render_fragment(name: str, school_id, section=ALL_SECTIONS) -> str:
+    """Render one fragment from the database and store it in the cache."""
+
+    html = _render(name, school_id, section)
+    cache.set(fragment_key(name, school_id, section), html, fragment_settings()["TIMEOUT"])
+    return html
+
+
+def _section_exists(school_id, section) -> bool:
+    return StudentProfile.objects.filter(school_id=school_id, section=section).exists()
+
+
+def get_fragments(names, school_id, section=ALL_SECTIONS) -> dict:
+    """
+    Cached HTML for several fragments of one scope (one cache round trip).
+
+    ``section`` usually comes from the query string: a missing fragment is
+    only rendered and stored for a section that exists (one of
+    section_options), anything else gets empty fragments. With ENABLED off
+    the cache is bypassed.
+    """
+
+    if not fragment_settings()["ENABLED"]:
+        return {name: mark_safe(_render(name, school_id, section)) for name in names}
+
+    keys = {name: fragment_key(name, school_id, section) for name in names}
+    cached = cache.get_many(keys.values())
+    if len(cached) < len(keys) and section is not ALL_SECTIONS and not _section_exists(school_id, section):
+        return {name: mark_safe("") for name in names}
+    return {
+        name: mark_safe(cached[key] if key in cached else render_fragment(name, school_id, section))
+        for name, key in keys.items()
+    }
+
+
+# Fragments that depend on StudentProfile.last_update (see core.activity).
+ROSTER_FRAGMENTS = ("roster", "roster_by_activity")
+
+ALL_FRAGMENTS = (*FRAGMENTS, *SCHOOL_FRAGMENTS)
+
+
+def render_section(school_id, section, names=ALL_FRAGMENTS) -> None:
+    for name in names:
+        if section is ALL_SECTIONS or name not in SCHOOL_FRAGMENTS:
+            render_fragment(name, school_id, section)
+
+
+def _render_keys(keys):
+    # (school, section) -> fragment names; every change also touches the
+    # school-wide scope.
+    scopes = {}
+    for school_id, section, names in keys:
+        scopes.setdefault((school_id, section), set()).update(names)
+        scopes.setdefault((school_id, ALL_SECTIONS), set()).update(names)
+    for (school_id, section), names in scopes.items():
+        render_section(school_id, section, [name for name in ALL_FRAGMENTS if name in names])
+
+
+_debouncer = None
+
+
+def get_debouncer() -> Debouncer:
+    global _debouncer
+    if _debouncer is None:
+        _debouncer = Debouncer(_render_keys, fragment_settings()["DELAY"], "fragment-render")
+    return _debouncer
+
+
+def schedule_render(school_id, section, names=ALL_FRAGMENTS) -> None:
+    """
+    Re-render a section's fragments (and the school-wide ones) after commit.
+    ``names`` limits the work to the fragments affected by the change.
+    """
+
+    if school_id is not None and fragment_settings()["ENABLED"]:
+        get_debouncer().schedule((school_id, section, tuple(names)))
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count taken from
+    settings.PASSWORD_HASH_ITERATIONS (see PASSWORD_HASH_PROFILES).
+
+    Uses the stock algorithm name, so existing hashes keep verifying and are
+    re-encoded with the configured cost on the user's next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_HASH_ITERATIONS", PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,191 @@
+"""
+Write-coalescing ingestion for FitnessTestEntry submissions.
+
+On test day many students submit at once and every BaseTestForm.save() is
+its own SQLite write transaction competing for the single writer lock.
+With settings.TEST_ENTRY_INGEST["ENABLED"], validated entries go onto an
+in-process queue instead. A writer thread commits them in small grouped
+transactions:
+
+* a batch is flushed once it holds MAX_BATCH entries or the oldest entry
+  has waited MAX_DELAY seconds (bounded latency);
+* the queue holds at most QUEUE_SIZE entries. Submitters block for up to
+  SUBMIT_TIMEOUT seconds for space and then write directly (back-pressure);
+* submit() only returns once the entry's transaction has committed, so
+  redirecting to student_progress afterwards always shows the new entry.
+  It waits at most SUBMIT_TIMEOUT + MAX_DELAY seconds for that. If the
+  writer has not picked the entry up by then it is withdrawn and saved
+  directly; if the writer is stuck in the middle of writing it,
+  IngestTimeout is raised and the entry may or may not have been saved.
+
+bulk_create does not send post_save, so submit() sends it in the caller's
+thread after the commit. Receivers behave the same as on the direct path.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models.signals import post_save
+
+DEFAULTS = {
+    "ENABLED": False,
+    "MAX_BATCH": 50,
+    "MAX_DELAY": 0.005,
+    "QUEUE_SIZE": 1000,
+    "SUBMIT_TIMEOUT": 5.0,
+}
+
+
+def ingest_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "TEST_ENTRY_INGEST", {})}
+
+
+class IngestTimeout(Exception):
+    """The writer thread did not finish writing a submitted entry in time."""
+
+
+class WriteCoalescer:
+    def __init__(self, max_batch=50, max_delay=0.005, queue_size=1000, submit_timeout=5.0):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.submit_timeout = submit_timeout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.commits = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="test-entry-writer", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout=None):
+        """Flush everything queued so far and stop the writer thread."""
+
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join(timeout)
+
+    def submit(self, entry):
+        """
+        Queue an unsaved model instance and block until it is committed.
+        Returns the saved instance.
+        """
+
+        self.start()
+        future = Future()
+        try:
+            self.queue.put((entry, future), timeout=self.submit_timeout)
+        except queue.Full:
+            entry.save()
+            return entry
+
+        try:
+            future.result(timeout=self.submit_timeout + self.max_delay)
+        except TimeoutError:
+            if not future.cancel():
+                raise IngestTimeout("Timed out waiting for the test entry writer.")
+            # The writer never took the entry (stalled or died); it will skip it.
+            entry.save()
+            return entry
+        post_save.send(
+            sender=type(entry), instance=entry, created=True,
+            update_fields=None, raw=False, using=entry._state.db,
+        )
+        return entry
+
+    def _next_batch(self):
+        item = self.queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        try:
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if batch:
+                    close_old_connections()
+                    self._write(batch)
+        finally:
+            connection.close()
+
+    def _write(self, batch):
+        # Skip entries whose submitter gave up waiting and saved them itself.
+        batch = [(entry, future) for entry, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        entries = [entry for entry, _ in batch]
+        model = type(entries[0])
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(entries)
+        except Exception:
+            # Isolate the failing entries so one bad row does not fail the batch.
+            for entry, future in batch:
+                entry.pk = None
+                entry._state.adding = True
+                try:
+                    with transaction.atomic():
+                        model.objects.bulk_create([entry])
+                except Exception as exc:
+                    future.set_exception(exc)
+                else:
+                    self.commits += 1
+                    future.set_result(entry)
+            return
+
+        self.commits += 1
+        for entry, future in batch:
+            future.set_result(entry)
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def get_coalescer() -> WriteCoalescer:
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            config = ingest_settings()
+            _coalescer = WriteCoalescer(
+                max_batch=config["MAX_BATCH"],
+                max_delay=config["MAX_DELAY"],
+                queue_size=config["QUEUE_SIZE"],
+                submit_timeout=config["SUBMIT_TIMEOUT"],
+            )
+        return _coalescer
+
+
+def save_entry(entry):
+    """Save a new FitnessTestEntry, coalescing writes when enabled."""
+
+    if ingest_settings()["ENABLED"]:
+        return get_coalescer().submit(entry)
+    entry.save()
+    return entry
@@ -0,0 +1,208 @@
+"""
+Top-K leaderboards per metric, school-wide and per section, for each school.
+
+Only each student's latest FitnessTestEntry counts. Boards are kept in the
+cache and patched as entries are saved or deleted (see core.signals), so
+reading one is a single cache get. A board stores its top LEADERBOARD_SIZE
+rows and whether that is every ranked student in the scope ("complete").
+When a student on an incomplete board drops out or gets worse, the next
+student is unknown, so that one board is recomputed from the database.
+Boards also expire after LEADERBOARD_TIMEOUT as a safety net against
+concurrent read-modify-write races between workers.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .cache import tenant_key
+
+# Agility and speed are recorded as times, so lower is better.
+LEADERBOARD_METRICS = {
+    "vo2_max": "desc",
+    "flexibility": "desc",
+    "strength": "desc",
+    "endurance": "desc",
+    "agility": "asc",
+    "speed": "asc",
+}
+SCHOOL = None
+
+LATEST_ENTRY_SQL = """
+    e.id = (
+        SELECT e2.id FROM core_fitnesstestentry e2
+        WHERE e2.student_id = e.student_id
+        ORDER BY e2.created_at DESC, e2.id DESC
+        LIMIT 1
+    )
+"""
+
+
+def leaderboard_size() -> int:
+    return getattr(settings, "LEADERBOARD_SIZE", 10)
+
+
+def leaderboard_timeout() -> int:
+    return getattr(settings, "LEADERBOARD_TIMEOUT", 600)
+
+
+def leaderboard_key(metric: str, school_id, section=SCHOOL) -> str:
+    scope = "school" if section is SCHOOL else f"section:{section}"
+    return tenant_key(school_id, "leaderboard", metric, scope)
+
+
+def _valid(column: str) -> str:
+    return f"CASE WHEN typeof({column}) IN ('integer', 'real') THEN {column} END"
+
+
+def _sort_key(metric: str):
+    sign = -1 if LEADERBOARD_METRICS[metric] == "desc" else 1
+    return lambda row: (sign * row["value"], row["created_at"], row["entry_id"])
+
+
+def compute_leaderboard(metric: str, school_id, section=SCHOOL) -> dict:
+    """Build a board from the database (one query)."""
+
+    size = leaderboard_size()
+    direction = "DESC" if LEADERBOARD_METRICS[metric] == "desc" else "ASC"
+    query = f"""
+        SELECT e.student_id, p.full_name, p.section, e.id, CAST(e.created_at AS TEXT),
+               {_valid("e." + metric)} AS value
+        FROM core_fitnesstestentry e
+        JOIN core_studentprofile p ON p.id = e.student_id
+        WHERE e.school_id = %s AND {LATEST_ENTRY_SQL} AND value IS NOT NULL
+    """
+    params = [school_id]
+    if section is not SCHOOL:
+        query += " AND p.section = %s"
+        params.append(section)
+    query += f" ORDER BY value {direction}, e.created_at, e.id LIMIT %s"
+    params.append(size + 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        rows = [
+            {
+                "student_id": student_id,
+                "name": full_name,
+                "section": student_section,
+                "entry_id": entry_id,
+                "created_at": created_at,
+                "value": float(value),
+            }
+            for student_id, full_name, student_section, entry_id, created_at, value in cursor.fetchall()
+        ]
+    return {"rows": rows[:size], "complete": len(rows) <= size}
+
+
+def get_leaderboard(metric: str, school_id, section=SCHOOL) -> list:
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f"Unknown leaderboard metric {metric!r}.")
+    key = leaderboard_key(metric, school_id, section)
+    board = cache.get(key)
+    if board is None:
+        board = compute_leaderboard(metric, school_id, section)
+        cache.set(key, board, leaderboard_timeout())
+    return board["rows"]
+
+
+def _latest_entry(student_id):
+    """
+    Return ``(full_name, school_id, section, entry_id, created_at, *metrics)``
+    for the student's latest entry; entry columns are None if they have no
+    entries.
+    """
+
+    metrics = ", ".join(_valid("e." + metric) for metric in LEADERBOARD_METRICS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT p.full_name, p.school_id, p.section, e.id, CAST(e.created_at AS TEXT), {metrics}
+            FROM core_studentprofile p
+            LEFT JOIN core_fitnesstestentry e ON e.student_id = p.id AND {LATEST_ENTRY_SQL}
+            WHERE p.id = %s
+            """,
+            [student_id],
+        )
+        return cursor.fetchone()
+
+
+def _patch(board: dict, metric: str, student_id, row):
+    """
+    Apply one student's new row (or None) to a board. Returns the updated
+    board, or None if it has to be recomputed.
+    """
+
+    key = _sort_key(metric)
+    old = next((r for r in board["rows"] if r["student_id"] == student_id), None)
+    rows = [r for r in board["rows"] if r["student_id"] != student_id]
+
+    if old is not None and not board["complete"] and (row is None or key(row) > key(old)):
+        return None
+
+    complete = board["complete"]
+    if row is not None:
+        size = leaderboard_size()
+        if len(rows) < size or key(row) < key(rows[-1]):
+            rows.append(row)
+            rows.sort(key=key)
+            if len(rows) > size:
+                rows = rows[:size]
+                complete = False
+        elif complete:
+            # The row is ranked but does not make the cut any more.
+            complete = False
+    return {"rows": rows, "complete": complete}
+
+
+def _update(metric: str, school_id, section, student_id, row) -> None:
+    key = leaderboard_key(metric, school_id, section)
+    board = cache.get(key)
+    if board is None:
+        return  # built lazily on the next read
+    board = _patch(board, metric, student_id, row)
+    if board is None:
+        board = compute_leaderboard(metric, school_id, section)
+    cache.set(key, board, leaderboard_timeout())
+
+
+def refresh_student(student_id, previous=None) -> None:
+    """
+    Re-rank ``student_id`` on every board after one of their entries (or
+    their profile) changed. ``previous`` is the ``(school_id, section)``
+    the student just left, if any; they are removed from those boards.
+    """
+
+    latest = _latest_entry(student_id)
+    if latest is None:
+        full_name = school_id = current_section = entry_id = None
+        values = [None] * len(LEADERBOARD_METRICS)
+    else:
+        full_name, school_id, current_section, entry_id, created_at, *values = latest
+
+    for metric, value in zip(LEADERBOARD_METRICS, values):
+        row = None
+        if entry_id is not None and value is not None:
+            row = {
+                "student_id": student_id,
+                "name": full_name,
+                "section": current_section,
+                "entry_id": entry_id,
+                "created_at": created_at,
+                "value": float(value),
+            }
+        if school_id is not None:
+            _update(metric, school_id, SCHOOL, student_id, row)
+            _update(metric, school_id, current_section, student_id, row)
+        if previous and previous != (school_id, current_section):
+            previous_school, previous_section = previous
+            if previous_school != school_id:
+                _update(metric, previous_school, SCHOOL, student_id, None)
+            _update(metric, previous_school, previous_section, student_id, None)
+
+
+def clear_leaderboards(school_id, sections=()) -> None:
+    cache.delete_many(
+        [leaderboard_key(metric, school_id, section) for metric in LEADERBOARD_METRICS
+         for section in (SCHOOL, *sections)]
+    )
@@ -0,0 +1,74 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.activity import ActivityBuffer
+from core.benchmarks import benchmark_database, bulk_create_students, create_student, summarize, timed
+from core.fragments import roster
+from core.models import StudentProfile
+
+
+class Command(BaseCommand):
+    help = "Compare writing last_update on every view with buffered activity tracking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=5000)
+        parser.add_argument("--views", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with benchmark_database():
+            profiles = bulk_create_students(options["students"])
+            ids = [profile.pk for profile in profiles]
+            views = [rng.choice(ids) for _ in range(options["views"])]
+
+            def write_each_view():
+                for pk in views:
+                    StudentProfile.objects.filter(pk=pk).update(last_update=timezone.now())
+
+            buffer = ActivityBuffer(flush_interval=3600)
+
+            def record_each_view():
+                for pk in views:
+                    buffer.record(pk)
+
+            rows = [
+                ("write per view", summarize(timed(write_each_view)), len(views)),
+                ("buffer per view", summarize(timed(record_each_view)), 0),
+                ("flush buffer", summarize(timed(buffer.flush)), 1),
+            ]
+
+            _, student = create_student("bench-student")
+            client = Client()
+            client.login(username="bench-student", password="bench-pass-123")
+            url = reverse("student_progress")
+            client.get(url)
+            with CaptureQueriesContext(connection) as ctx:
+                for _ in range(20):
+                    client.get(url)
+            request_writes = sum(
+                1 for query in ctx.captured_queries if query["sql"].lstrip().upper().startswith("UPDATE")
+            ) / 20
+
+            school_wide = summarize(timed(
+                lambda: roster(student.school_id, order="last_update"), repeat=5))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "EXPLAIN QUERY PLAN SELECT id FROM core_studentprofile "
+                    "WHERE school_id = %s ORDER BY last_update DESC LIMIT 50",
+                    [student.school_id],
+                )
+                plan = [row[-1] for row in cursor.fetchall()]
+
+        self.stdout.write(f"{options['views']} views over {options['students']} students")
+        self.stdout.write(f"{'strategy':<18}{'total ms':>10}{'write txns':>12}")
+        for label, stats, writes in rows:
+            self.stdout.write(f"{label:<18}{stats['median_ms']:>10.2f}{writes:>12}")
+        self.stdout.write(f"UPDATE queries per authenticated request: {request_writes:.1f}")
+        self.stdout.write(f"roster by last_update (school-wide): {school_wide['median_ms']:.1f} ms")
+        self.stdout.write(f"plan: {'; '.join(plan)}")
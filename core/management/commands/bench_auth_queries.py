@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.benchmarks import benchmark_database, create_student
+
+AUTH_TABLES = ("django_session", "auth_user", "core_studentprofile")
+
+CACHED_AUTH = "core.middleware.CachedAuthenticationMiddleware"
+DJANGO_AUTH = "django.contrib.auth.middleware.AuthenticationMiddleware"
+
+
+class Command(BaseCommand):
+    help = "Count auth-related queries per authenticated request, before and after caching."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            create_student("bench-student")
+            baseline_middleware = [
+                DJANGO_AUTH if m == CACHED_AUTH else m for m in settings.MIDDLEWARE
+            ]
+
+            with override_settings(
+                SESSION_ENGINE="django.contrib.sessions.backends.db",
+                MIDDLEWARE=baseline_middleware,
+            ):
+                before = self.measure(options["requests"])
+            after = self.measure(options["requests"])
+
+        self.stdout.write(f"{'setup':<10}{'auth queries/req':>18}{'total queries/req':>19}")
+        self.stdout.write(f"{'db':<10}{before[0]:>18.2f}{before[1]:>19.2f}")
+        self.stdout.write(f"{'cached':<10}{after[0]:>18.2f}{after[1]:>19.2f}")
+
+    def measure(self, count):
+        cache.clear()
+        client = Client()
+        client.login(username="bench-student", password="bench-pass-123")
+        url = reverse("student_progress")
+        client.get(url)  # warm the caches
+
+        auth_queries = total_queries = 0
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as ctx:
+                client.get(url)
+            total_queries += len(ctx.captured_queries)
+            auth_queries += sum(
+                1
+                for query in ctx.captured_queries
+                if any(f'"{table}"' in query["sql"] for table in AUTH_TABLES)
+            )
+        return auth_queries / count, total_queries / count
@@ -0,0 +1,103 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import fragments
+from core.benchmarks import benchmark_database, bulk_create_students, create_student, summarize
+from core.models import METRIC_FIELDS, FitnessTestEntry, Remark
+
+
+class Command(BaseCommand):
+    help = "Compare page views that render their fragments with views that read them pre-rendered."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=2000)
+        parser.add_argument("--sections", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=30)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with benchmark_database():
+            self.populate(rng, options["students"], options["sections"])
+            user, teacher = create_student("bench-teacher", section="10-0")
+            user.is_staff = True
+            user.save(update_fields=["is_staff"])
+            names = [*fragments.FRAGMENTS, *fragments.SCHOOL_FRAGMENTS]
+            fragment_keys = [
+                fragments.fragment_key(name, teacher.school_id, section)
+                for name in names
+                for section in (fragments.ALL_SECTIONS, "10-0", "10-1")
+            ]
+            client = Client()
+            client.login(username="bench-teacher", password="bench-pass-123")
+
+            pages = [
+                ("class analytics", reverse("class_analytics")),
+                ("class analytics 10-1", reverse("class_analytics") + "?section=10-1"),
+                ("roster", reverse("student_management")),
+                ("roster 10-1", reverse("student_management") + "?section=10-1"),
+            ]
+            rows = []
+            for label, url in pages:
+                cold = self.measure(client, url, options["requests"], fragment_keys)
+                warm = self.measure(client, url, options["requests"])
+                rows.append((label, cold, warm))
+
+            # Time from a new entry to re-rendered fragments, off the request path.
+            entry = FitnessTestEntry.objects.select_related("student").first()
+            start = time.perf_counter()
+            fragments.schedule_render(entry.school_id, entry.student.section)
+            fragments.get_debouncer().flush()
+            rerender = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(
+            f"{'page':<22}{'render ms':>11}{'queries':>9}{'cached ms':>11}{'queries':>9}"
+        )
+        for label, cold, warm in rows:
+            self.stdout.write(
+                f"{label:<22}{cold[0]:>11.2f}{cold[1]:>9.1f}{warm[0]:>11.2f}{warm[1]:>9.1f}"
+            )
+        self.stdout.write(f"background re-render of one section + school: {rerender:.1f} ms")
+
+    def measure(self, client, url, count, clear_keys=()):
+        client.get(url)  # warm the session, user and profile caches
+        durations = []
+        queries = 0
+        for _ in range(count):
+            cache.delete_many(clear_keys)
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = client.get(url)
+                durations.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+            queries += sum(
+                1
+                for query in ctx.captured_queries
+                if "core_fitnesstestentry" in query["sql"] or "core_remark" in query["sql"]
+            )
+        return summarize(durations)["median_ms"], queries / count
+
+    def populate(self, rng, students, sections):
+        profiles = bulk_create_students(students, sections=sections)
+        entries = [
+            FitnessTestEntry(
+                student=profile,
+                school_id=profile.school_id,
+                test_type=test_type,
+                **{field: Decimal(f"{rng.uniform(5, 95):.2f}") for field in METRIC_FIELDS},
+            )
+            for profile in profiles
+            for test_type in (FitnessTestEntry.PRETEST, FitnessTestEntry.POSTTEST)
+        ]
+        FitnessTestEntry.objects.bulk_create(entries, batch_size=2000)
+        Remark.objects.bulk_create(
+            [Remark(student=rng.choice(profiles), text="Keep it up.") for _ in range(students // 2)],
+            batch_size=2000,
+        )
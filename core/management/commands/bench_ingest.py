@@ -0,0 +1,98 @@
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from core import ingest
+from core.benchmarks import benchmark_database, bulk_create_students, summarize
+from core.forms import PreTestForm
+from core.models import FitnessTestEntry
+
+SUBMISSION = {
+    "height_cm": Decimal("160"),
+    "weight_kg": Decimal("55"),
+    "vo2_max": Decimal("42.5"),
+    "flexibility": Decimal("30"),
+    "strength": Decimal("25"),
+    "agility": Decimal("12"),
+    "speed": Decimal("8"),
+    "endurance": Decimal("20"),
+}
+
+
+class Command(BaseCommand):
+    help = "Simulate a test-day submission burst with direct vs coalesced writes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--submissions", type=int, default=25, help="Per thread.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            with benchmark_database(test_name=os.path.join(directory, "bench.sqlite3")):
+                students = bulk_create_students(options["threads"])
+                results = [
+                    ("direct", self.burst(students, options["submissions"], coalesce=False)),
+                    ("coalesced", self.burst(students, options["submissions"], coalesce=True)),
+                ]
+
+        self.stdout.write(
+            f"{'path':<11}{'saved':>7}{'errors':>8}{'commits':>9}{'commits/s':>11}"
+            f"{'submits/s':>11}{'median ms':>11}{'p99 ms':>9}"
+        )
+        for label, r in results:
+            self.stdout.write(
+                f"{label:<11}{r['saved']:>7}{r['errors']:>8}{r['commits']:>9}"
+                f"{r['commits'] / r['elapsed']:>11.0f}{r['saved'] / r['elapsed']:>11.0f}"
+                f"{r['median_ms']:>11.2f}{r['p99_ms']:>9.2f}"
+            )
+
+    def burst(self, students, per_thread, coalesce):
+        FitnessTestEntry.objects.all().delete()
+        latencies, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(students))
+
+        def worker(student):
+            barrier.wait()
+            for _ in range(per_thread):
+                start = time.perf_counter()
+                try:
+                    form = PreTestForm(SUBMISSION)
+                    form.is_valid()
+                    form.save(student)
+                except Exception as exc:
+                    with lock:
+                        errors.append(exc)
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            connection.close()
+
+        with override_settings(TEST_ENTRY_INGEST={**settings.TEST_ENTRY_INGEST, "ENABLED": coalesce}):
+            ingest._coalescer = None
+            threads = [threading.Thread(target=worker, args=(s,)) for s in students]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            commits = ingest.get_coalescer().commits if coalesce else len(latencies)
+            if coalesce:
+                ingest.get_coalescer().stop()
+            ingest._coalescer = None
+
+        return {
+            "saved": FitnessTestEntry.objects.count(),
+            "errors": len(errors),
+            "commits": commits,
+            "elapsed": elapsed,
+            **summarize(latencies),
+        }
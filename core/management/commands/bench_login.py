@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from core.benchmarks import benchmark_database
+from core.forms import StudentLoginForm
+
+PASSWORD = "bench-pass-123"
+
+
+class Command(BaseCommand):
+    help = "Measure CPU cost of StudentLoginForm validation (logins per second per core)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attempts", type=int, default=10)
+
+    def handle(self, *args, **options):
+        attempts = options["attempts"]
+        factory = RequestFactory()
+
+        def validate(username, password, ip="10.0.0.1"):
+            request = factory.post("/login/", REMOTE_ADDR=ip)
+            form = StudentLoginForm({"username": username, "password": password}, request=request)
+            return form.is_valid()
+
+        def cpu_per_attempt(username, password, vary_ip=True):
+            cache.clear()
+            start = time.process_time()
+            for i in range(attempts):
+                validate(username, password, ip=f"10.0.{i // 250}.{i % 250}" if vary_ip else "10.0.0.1")
+            return (time.process_time() - start) / attempts
+
+        rows = []
+        with benchmark_database():
+            User = get_user_model()
+            for profile, iterations in settings.PASSWORD_HASH_PROFILES.items():
+                with override_settings(PASSWORD_HASH_ITERATIONS=iterations):
+                    User.objects.filter(username="bench").delete()
+                    User.objects.create_user(username="bench", password=PASSWORD)
+                    rows.append((f"valid login ({profile})", cpu_per_attempt("bench", PASSWORD)))
+
+            rows.append(("wrong password (throttled)", cpu_per_attempt("bench", "nope", vary_ip=False)))
+
+            # Prime the negative cache once, then measure the cached rejections.
+            cache.clear()
+            validate("nobody", "nope")
+            start = time.process_time()
+            for i in range(attempts):
+                validate("nobody", "nope", ip=f"10.1.0.{i % 250}")
+            rows.append(("unknown username (cached)", (time.process_time() - start) / attempts))
+
+        self.stdout.write(f"{'scenario':<30}{'cpu ms/attempt':>16}{'attempts/s/core':>17}")
+        for label, seconds in rows:
+            rate = 1 / seconds if seconds else float("inf")
+            self.stdout.write(f"{label:<30}{seconds * 1000:>16.2f}{rate:>17.0f}")
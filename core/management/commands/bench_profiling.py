@@ -0,0 +1,49 @@
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from core import profiling
+from core.benchmarks import summarize, timed
+
+
+class Command(BaseCommand):
+    help = "Measure ProfilingMiddleware overhead while idle and while a session is armed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20_000)
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        request = RequestFactory().get("/student-progress/")
+
+        def view(request):
+            return HttpResponse("ok")
+
+        def direct():
+            for _ in range(count):
+                view(request)
+
+        def through_middleware():
+            for _ in range(count):
+                profiling.maybe_profile(view, request)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(PROFILE_DIR=directory):
+            profiling.stop_session()
+            rows = [
+                ("no middleware", summarize(timed(direct, repeat=5))),
+                ("idle", summarize(timed(through_middleware, repeat=5))),
+            ]
+            profiling.start_session("^/other/", count * 10)
+            rows.append(("armed, other path", summarize(timed(through_middleware, repeat=5))))
+            profiling.stop_session()
+            profiling.start_session("^/student-progress/", 100)
+            rows.append(("armed, profiled", summarize(timed(
+                lambda: [profiling.maybe_profile(view, request) for _ in range(100)]))))
+            profiling.stop_session()
+
+        self.stdout.write(f"{'mode':<20}{'us/request':>12}")
+        for label, stats in rows:
+            per_request = count if label != "armed, profiled" else 100
+            self.stdout.write(f"{label:<20}{stats['median_ms'] * 1000 / per_request:>12.2f}")
@@ -0,0 +1,56 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import benchmark_database, bulk_create_students, summarize, timed
+from core.models import Remark
+from core.search import search_remarks
+
+WORDS = (
+    "improved endurance strength flexibility posture running sprint warmup cooldown "
+    "effort attendance form technique stamina breathing hydration rest recovery "
+    "shoulder ankle hamstring injury monitor coach parent schedule retest"
+).split()
+RARE_WORDS = ["asthma", "knee"]
+
+
+class Command(BaseCommand):
+    help = "Compare LIKE scans with the FTS5 index for Remark search."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--remarks", type=int, default=1_000_000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with benchmark_database():
+            students = bulk_create_students(500)
+            batch = []
+            for _ in range(options["remarks"]):
+                words = rng.choices(WORDS, k=rng.randint(6, 20))
+                if rng.random() < 0.002:
+                    words.insert(rng.randrange(len(words)), rng.choice(RARE_WORDS))
+                batch.append(Remark(student=rng.choice(students), text=" ".join(words).capitalize()))
+                if len(batch) == 10_000:
+                    Remark.objects.bulk_create(batch)
+                    batch = []
+            Remark.objects.bulk_create(batch)
+
+            def like_scan():
+                queryset = Remark.objects.filter(text__icontains="asthma").select_related(
+                    "student", "author"
+                )
+                return queryset.count(), list(queryset[:20])
+
+            like = summarize(timed(like_scan, repeat=3))
+            fts = summarize(timed(lambda: search_remarks("asthma"), repeat=20))
+            fts_or = summarize(timed(lambda: search_remarks("asthma OR knee", page=3), repeat=20))
+            total = search_remarks("asthma")["total"]
+
+        self.stdout.write(f"{options['remarks']} remarks, {total} mention asthma")
+        self.stdout.write(f"{'query':<28}{'median ms':>12}{'p99 ms':>10}")
+        for label, stats in [
+            ("LIKE '%asthma%'", like),
+            ("fts: asthma", fts),
+            ("fts: asthma OR knee, p3", fts_or),
+        ]:
+            self.stdout.write(f"{label:<28}{stats['median_ms']:>12.2f}{stats['p99_ms']:>10.2f}")
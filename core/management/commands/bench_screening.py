@@ -0,0 +1,72 @@
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import benchmark_database, bulk_create_students, summarize, timed
+from core.models import METRIC_FIELDS, FitnessTestEntry, OutlierFlag
+from core.screening import screen
+
+# Plausible (mean, standard deviation) per metric.
+METRIC_DISTRIBUTIONS = {
+    "bmi": (21, 3),
+    "vo2_max": (45, 6),
+    "flexibility": (40, 8),
+    "strength": (30, 6),
+    "agility": (12, 1.5),
+    "speed": (8, 1),
+    "endurance": (60, 10),
+}
+
+
+class Command(BaseCommand):
+    help = "Time outlier screening of a whole school and of one section."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=100_000)
+        parser.add_argument("--sections", type=int, default=40)
+        parser.add_argument("--typo-rate", type=float, default=0.002)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with benchmark_database():
+            typos = self.populate(rng, options["entries"], options["sections"], options["typo_rate"])
+            school_id = FitnessTestEntry.objects.values_list("school_id", flat=True).first()
+
+            rows = [
+                ("screen school", summarize(timed(lambda: screen(school_id), repeat=3))),
+                ("screen one section", summarize(timed(lambda: screen(school_id, ["10-0"]), repeat=10))),
+            ]
+            screen(school_id)
+            caught = set(OutlierFlag.objects.values_list("entry_id", "metric"))
+
+        self.stdout.write(f"{'operation':<22}{'median ms':>12}{'p99 ms':>10}")
+        for label, stats in rows:
+            self.stdout.write(f"{label:<22}{stats['median_ms']:>12.2f}{stats['p99_ms']:>10.2f}")
+        self.stdout.write(
+            f"typos injected: {len(typos)}, flagged: {len(caught)}, "
+            f"typos caught: {len(typos & caught)}"
+        )
+
+    def populate(self, rng, entries, sections, typo_rate):
+        students = bulk_create_students(max(1, entries // 10), sections=sections)
+        batch = []
+        typos = []
+        for _ in range(entries):
+            student = rng.choice(students)
+            values = {
+                field: round(rng.gauss(mean, sd), 2) for field, (mean, sd) in METRIC_DISTRIBUTIONS.items()
+            }
+            if rng.random() < typo_rate:
+                # A decimal point typed in the wrong place.
+                field = rng.choice(METRIC_FIELDS)
+                values[field] *= 10
+                typos.append((len(batch), field))
+            batch.append(FitnessTestEntry(
+                student=student,
+                school_id=student.school_id,
+                test_type=rng.choice([FitnessTestEntry.PRETEST, FitnessTestEntry.POSTTEST]),
+                **{field: Decimal(f"{value:.2f}") for field, value in values.items()},
+            ))
+        FitnessTestEntry.objects.bulk_create(batch, batch_size=2000)
+        return {(batch[index].pk, field) for index, field in typos}
@@ -0,0 +1,79 @@
+import random
+import tempfile
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.benchmarks import benchmark_database, bulk_create_students, summarize, timed
+from core.models import METRIC_FIELDS, FitnessTestEntry
+from core.snapshot import MetricSnapshot, build_snapshot
+
+
+class Command(BaseCommand):
+    help = "Compare a cross-section ORM scan with the memory-mapped metric snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=50_000)
+        parser.add_argument("--sections", type=int, default=40)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with benchmark_database(), tempfile.TemporaryDirectory() as directory:
+            self.populate(rng, options["entries"], options["sections"])
+            # Spread the entries' updated_at over the past day so only a few
+            # fall into the snapshot's watermark overlap, as in production.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE core_fitnesstestentry "
+                    "SET updated_at = datetime('now', printf('-%d seconds', 60 + id % 86400))"
+                )
+            year_start = timezone.now().replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+
+            def orm_scan():
+                values = []
+                for entry in FitnessTestEntry.objects.filter(
+                    student__age=14, created_at__gte=year_start
+                ).only("vo2_max"):
+                    try:
+                        values.append(Decimal(str(entry.vo2_max)))
+                    except InvalidOperation:
+                        continue
+                return sorted(values)
+
+            build = timed(lambda: build_snapshot(directory, full=True))
+            snapshot = MetricSnapshot.open(directory)
+
+            rows = [
+                ("build snapshot (full)", summarize(build)),
+                ("orm: vo2_max age=14", summarize(timed(orm_scan, repeat=3))),
+                ("snapshot: aggregate", summarize(timed(
+                    lambda: snapshot.aggregate("vo2_max", age=14, since=year_start), repeat=20))),
+                ("snapshot: histogram", summarize(timed(
+                    lambda: snapshot.histogram("vo2_max", age=14, since=year_start), repeat=20))),
+                ("snapshot: by section", summarize(timed(
+                    lambda: snapshot.aggregate_by_section("vo2_max", age=14), repeat=20))),
+            ]
+
+            FitnessTestEntry.objects.filter(pk__in=range(1, 101)).update(
+                vo2_max=Decimal("42"), updated_at=timezone.now()
+            )
+            rows.append(("incremental update", summarize(timed(lambda: build_snapshot(directory)))))
+
+        self.stdout.write(f"{'operation':<26}{'median ms':>12}{'p99 ms':>10}")
+        for label, stats in rows:
+            self.stdout.write(f"{label:<26}{stats['median_ms']:>12.2f}{stats['p99_ms']:>10.2f}")
+
+    def populate(self, rng, entries, sections):
+        students = bulk_create_students(max(1, entries // 10), sections=sections)
+        batch = []
+        for _ in range(entries):
+            student = rng.choice(students)
+            batch.append(FitnessTestEntry(
+                student=student,
+                school_id=student.school_id,
+                test_type=rng.choice([FitnessTestEntry.PRETEST, FitnessTestEntry.POSTTEST]),
+                **{field: Decimal(f"{rng.uniform(5, 95):.2f}") for field in METRIC_FIELDS},
+            ))
+        FitnessTestEntry.objects.bulk_create(batch, batch_size=2000)
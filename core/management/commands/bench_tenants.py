@@ -0,0 +1,75 @@
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Avg
+from django.utils import timezone
+
+from core.benchmarks import benchmark_database, bulk_create_students, summarize, timed
+from core.leaderboards import compute_leaderboard
+from core.models import METRIC_FIELDS, FitnessTestEntry, School, StudentProfile
+
+
+class Command(BaseCommand):
+    help = "Show per-tenant query latency as the number of schools grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenants", type=int, nargs="+", default=[1, 10, 50, 100])
+        parser.add_argument("--students", type=int, default=200, help="Per school.")
+        parser.add_argument("--entries", type=int, default=1000, help="Per school.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        results = []
+        with benchmark_database():
+            schools = []
+            for target in sorted(options["tenants"]):
+                while len(schools) < target:
+                    schools.append(self.create_school(rng, len(schools), options))
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                school = schools[0]
+                results.append((target, self.measure(school)))
+
+        queries = list(results[0][1])
+        self.stdout.write(f"{'schools':>8}" + "".join(f"{name:>20}" for name in queries))
+        for tenants, stats in results:
+            self.stdout.write(
+                f"{tenants:>8}" + "".join(f"{stats[name]['median_ms']:>17.2f} ms" for name in queries)
+            )
+
+    def create_school(self, rng, index, options):
+        school = School.objects.create(name=f"School {index}", slug=f"school-{index}")
+        students = bulk_create_students(
+            options["students"], school=school, seed=index, prefix=f"s{index}-"
+        )
+        FitnessTestEntry.objects.bulk_create(
+            [
+                FitnessTestEntry(
+                    student=student,
+                    school=school,
+                    test_type=rng.choice([FitnessTestEntry.PRETEST, FitnessTestEntry.POSTTEST]),
+                    **{field: Decimal(f"{rng.uniform(5, 95):.2f}") for field in METRIC_FIELDS},
+                )
+                for student in rng.choices(students, k=options["entries"])
+            ],
+            batch_size=2000,
+        )
+        return school
+
+    def measure(self, school):
+        since = timezone.now() - timezone.timedelta(days=365)
+        queries = {
+            "section roster": lambda: list(
+                StudentProfile.objects.for_school(school).filter(section="10-3").order_by("full_name")
+            ),
+            "post-test avg": lambda: FitnessTestEntry.objects.for_school(school)
+            .filter(test_type=FitnessTestEntry.POSTTEST, created_at__gte=since)
+            .aggregate(Avg("vo2_max")),
+            "recent entries": lambda: list(
+                FitnessTestEntry.objects.for_school(school).order_by("-created_at")[:50]
+            ),
+            "leaderboard": lambda: compute_leaderboard("vo2_max", school.pk),
+        }
+        return {name: summarize(timed(query, repeat=20)) for name, query in queries.items()}
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.snapshot import build_snapshot, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = "Update the memory-mapped FitnessTestEntry metric snapshot used for analytics."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild from scratch.")
+        parser.add_argument("--dir", help=f"Snapshot directory (default: {snapshot_dir()}).")
+
+    def handle(self, *args, **options):
+        meta = build_snapshot(options["dir"], full=options["full"])
+        self.stdout.write(
+            f"Snapshot has {meta['rows']} entries across {len(meta['sections'])} sections "
+            f"(watermark {meta['watermark']})."
+        )
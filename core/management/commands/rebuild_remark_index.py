@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_remark_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text index over Remark.text from scratch."
+
+    def handle(self, *args, **options):
+        rebuild_remark_index()
+        self.stdout.write("Remark search index rebuilt.")
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import School
+from core.screening import screen
+
+
+class Command(BaseCommand):
+    help = "Re-screen FitnessTestEntry values for outliers and refresh the OutlierFlag rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", help="School slug (default: every school).")
+        parser.add_argument("--section", action="append", help="Only these sections (repeatable).")
+
+    def handle(self, *args, **options):
+        schools = School.objects.all()
+        if options["school"]:
+            schools = schools.filter(slug=options["school"])
+            if not schools:
+                raise CommandError(f"No school with slug {options['school']!r}.")
+
+        for school in schools:
+            start = time.perf_counter()
+            flagged = screen(school.pk, options["section"])
+            self.stdout.write(
+                f"{school.slug}: {flagged} flagged values ({time.perf_counter() - start:.2f}s)"
+            )
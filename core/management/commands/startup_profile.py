@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: boot the WSGI app like a new worker would and
+# time the first and second request for each path.
+WORKER_SCRIPT = """
+import json, sys, time
+from io import BytesIO
+
+started = time.perf_counter()
+from config.wsgi import application
+boot_ms = (time.perf_counter() - started) * 1000
+
+def request(path):
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "",
+        "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": "localhost",
+        "wsgi.input": BytesIO(), "wsgi.url_scheme": "http", "wsgi.errors": sys.stderr,
+    }
+    status = []
+    started = time.perf_counter()
+    body = b"".join(application(environ, lambda s, h, exc_info=None: status.append(s)))
+    return (time.perf_counter() - started) * 1000, status[0]
+
+paths = sys.argv[1:]
+print(json.dumps({
+    "boot_ms": boot_ms,
+    "requests": [[path, *request(path), *request(path)] for path in paths],
+}))
+"""
+
+
+def group_name(module: str) -> str:
+    parts = module.split(".")
+    depth = 3 if parts[:2] == ["django", "contrib"] else 2
+    return ".".join(parts[:depth])
+
+
+def parse_importtime(stderr: str):
+    """Return ``(total_us, {group: self_us})`` from ``-X importtime`` output."""
+
+    groups = defaultdict(int)
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        groups[group_name(name.strip())] += int(self_us)
+        total += int(self_us)
+    return total, groups
+
+
+class Command(BaseCommand):
+    help = "Report import-time breakdown and time-to-first-response for a fresh worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", default=["/", "/login/"])
+        parser.add_argument("--top", type=int, default=15)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings"),
+                "FITNESS_DATABASE": os.path.join(directory, "startup.sqlite3"),
+            }
+            subprocess.run(
+                [sys.executable, "manage.py", "migrate", "--verbosity=0"],
+                cwd=settings.BASE_DIR, env=env, check=True,
+            )
+            runs = {
+                label: self.run_worker(options["paths"], {**env, "FITNESS_WARMUP": flag})
+                for label, flag in (("no warm-up", "0"), ("warm-up", "1"))
+            }
+
+        total_us, groups = runs["warm-up"]["imports"]
+        self.stdout.write(f"Import time: {total_us / 1000:.1f} ms (self time by package)")
+        for name, self_us in sorted(groups.items(), key=lambda item: -item[1])[: options["top"]]:
+            self.stdout.write(f"  {name:<32}{self_us / 1000:>9.1f} ms")
+
+        self.stdout.write("")
+        self.stdout.write(f"{'worker':<12}{'path':<20}{'boot ms':>9}{'1st req ms':>12}{'2nd req ms':>12}")
+        for label, run in runs.items():
+            for path, first_ms, status, second_ms, _ in run["requests"]:
+                self.stdout.write(
+                    f"{label:<12}{path:<20}{run['boot_ms']:>9.1f}{first_ms:>12.1f}{second_ms:>12.1f}"
+                    f"  [{status}]"
+                )
+
+    def run_worker(self, paths, env):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", WORKER_SCRIPT, *paths],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        report["imports"] = parse_importtime(result.stderr)
+        return report
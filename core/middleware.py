@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .activity import record_activity
+from .cache import get_cached_profile, get_cached_user, set_cached_user
+from .profiling import maybe_profile, profiling_settings
+from .tenancy import school_for_request
+
+
+def get_user(request):
+    """
+    Resolve the session's user from the cache, falling back to
+    django.contrib.auth.get_user (and priming the cache) on a miss or when
+    the cached user no longer matches the session's auth hash.
+    """
+
+    session = request.session
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return auth.get_user(request)
+
+    user = get_cached_user(user_id)
+    session_hash = session.get(auth.HASH_SESSION_KEY)
+    if (
+        user is not None
+        and backend_path in settings.AUTHENTICATION_BACKENDS
+        and session_hash
+        and constant_time_compare(session_hash, user.get_session_auth_hash())
+    ):
+        return user
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        set_cached_user(user)
+    return user
+
+
+def get_student_profile(request):
+    if not request.user.is_authenticated:
+        return None
+    return get_cached_profile(request.user)
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    Drop-in replacement for Django's AuthenticationMiddleware that serves
+    request.user from the cache and adds a lazy request.student_profile.
+
+    Combined with a cache-backed SESSION_ENGINE, an authenticated request
+    resolves session, user and profile without any database queries.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        request.student_profile = SimpleLazyObject(lambda: get_student_profile(request))
+
+
+class TenantMiddleware:
+    """Attach the School served on this host as a lazy ``request.school``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.school = SimpleLazyObject(lambda: school_for_request(request))
+        return self.get_response(request)
+
+
+class ActivityMiddleware:
+    """
+    Record each authenticated student request as activity. Only touches an
+    in-memory buffer; see core.activity for how it reaches the database.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.user.is_authenticated:
+            # Absent when Django's own AuthenticationMiddleware is in use.
+            profile = getattr(request, "student_profile", None)
+            if profile:
+                record_activity(profile.pk)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Run requests under cProfile while a staff member has armed a profiling
+    session (see core.profiling). Place it first to include the other
+    middleware in the profiles.
+    """
+
+    def __init__(self, get_response):
+        if not profiling_settings()["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return maybe_profile(self.get_response, request)
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS core_remark_fts USING fts5(
+        text, content='core_remark', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_remark_fts_ai AFTER INSERT ON core_remark BEGIN
+        INSERT INTO core_remark_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_remark_fts_ad AFTER DELETE ON core_remark BEGIN
+        INSERT INTO core_remark_fts(core_remark_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_remark_fts_au AFTER UPDATE OF text ON core_remark BEGIN
+        INSERT INTO core_remark_fts(core_remark_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO core_remark_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    "INSERT INTO core_remark_fts(core_remark_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_remark_fts_au",
+    "DROP TRIGGER IF EXISTS core_remark_fts_ad",
+    "DROP TRIGGER IF EXISTS core_remark_fts_ai",
+    "DROP TABLE IF EXISTS core_remark_fts",
+]
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        # FTS5 is SQLite-specific; other backends need their own index.
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_fitnesstestentry_studentprofile_remark_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,74 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_default_school(apps, schema_editor):
+    School = apps.get_model("core", "School")
+    StudentProfile = apps.get_model("core", "StudentProfile")
+    FitnessTestEntry = apps.get_model("core", "FitnessTestEntry")
+
+    if not StudentProfile.objects.exists():
+        return
+    school, _ = School.objects.get_or_create(slug="default", defaults={"name": "Default school"})
+    StudentProfile.objects.filter(school__isnull=True).update(school=school)
+    FitnessTestEntry.objects.filter(school__isnull=True).update(
+        school_id=models.Subquery(
+            StudentProfile.objects.filter(pk=models.OuterRef("student_id")).values("school_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_remark_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='School',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150)),
+                ('slug', models.SlugField(unique=True)),
+                ('domain', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='school',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='students', to='core.school'),
+        ),
+        migrations.AddField(
+            model_name='fitnesstestentry',
+            name='school',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.school'),
+        ),
+        migrations.RunPython(assign_default_school, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='school',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='students', to='core.school'),
+        ),
+        migrations.AlterField(
+            model_name='fitnesstestentry',
+            name='school',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.school'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['school', 'section'], name='profile_school_section_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['school', 'age'], name='profile_school_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fitnesstestentry',
+            index=models.Index(fields=['school', 'created_at'], name='entry_school_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fitnesstestentry',
+            index=models.Index(fields=['school', 'test_type', 'created_at'], name='entry_school_type_created_idx'),
+        ),
+    ]
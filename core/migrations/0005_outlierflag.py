@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_school'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutlierFlag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=50)),
+                ('metric', models.CharField(max_length=20)),
+                ('value', models.FloatField()),
+                ('median', models.FloatField()),
+                ('spread', models.FloatField()),
+                ('score', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outlier_flags', to='core.fitnesstestentry')),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.school')),
+            ],
+            options={
+                'ordering': ['section', '-score'],
+                'indexes': [models.Index(fields=['school', 'section'], name='outlier_school_section_idx')],
+                'constraints': [models.UniqueConstraint(fields=('entry', 'metric'), name='unique_outlier_flag')],
+            },
+        ),
+    ]
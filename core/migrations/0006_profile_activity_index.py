@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_outlierflag'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Start from each student's latest test so the roster is not empty
+        # until they next sign in.
+        migrations.RunSQL(
+            """
+            UPDATE core_studentprofile
+            SET last_update = (
+                SELECT MAX(e.created_at) FROM core_fitnesstestentry e
+                WHERE e.student_id = core_studentprofile.id
+            )
+            WHERE last_update IS NULL
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['school', 'last_update'], name='profile_school_activity_idx'),
+        ),
+    ]
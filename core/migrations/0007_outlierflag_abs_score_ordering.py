@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:10
+
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_profile_activity_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='outlierflag',
+            options={'ordering': ['section', models.OrderBy(django.db.models.functions.math.Abs('score'), descending=True)]},
+        ),
+    ]
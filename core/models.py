@@ -1,25 +1,67 @@
 from django.db import models
+from django.db.models.functions import Abs
 from django.contrib.auth.models import User
 
 
+class School(models.Model):
+    """
+    A tenant. Every StudentProfile (and, denormalized, every
+    FitnessTestEntry) belongs to one school; requests are mapped to a school
+    by host name in TenantMiddleware.
+    """
+    name = models.CharField(max_length=150)
+    slug = models.SlugField(unique=True)
+    # Host name this school is served on, e.g. "bsu.fitness.example.com"
+    domain = models.CharField(max_length=255, unique=True, null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class TenantQuerySet(models.QuerySet):
+    """QuerySet for models with a ``school`` foreign key."""
+
+    def for_school(self, school):
+        return self.filter(school=school)
+
+
+TenantManager = models.Manager.from_queryset(TenantQuerySet)
+
+
 class StudentProfile(models.Model):
     """
     Extra info for a student linked to Django's built-in User.
     Login/auth uses User (username / password), this stores fitness info.
     """
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+    school = models.ForeignKey(School, on_delete=models.PROTECT, related_name="students")
 
     full_name = models.CharField(max_length=100)
     age = models.PositiveIntegerField()
     section = models.CharField(max_length=50)
 
     # Optional: cache last update time for quick display in tables
+    # (last activity, written in batches by core.activity)
     last_update = models.DateTimeField(null=True, blank=True)
 
+    objects = TenantManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["school", "section"], name="profile_school_section_idx"),
+            models.Index(fields=["school", "age"], name="profile_school_age_idx"),
+            # Roster sorted/filtered by last activity
+            models.Index(fields=["school", "last_update"], name="profile_school_activity_idx"),
+        ]
+
     def __str__(self):
         return f"{self.full_name} ({self.section})"
 
 
+# Numeric FitnessTestEntry columns used by analytics (snapshot, screening).
+METRIC_FIELDS = ("bmi", "vo2_max", "flexibility", "strength", "agility", "speed", "endurance")
+
+
 class FitnessTestEntry(models.Model):
     """
     One row = one test (pre or post) for one student.
@@ -34,6 +76,8 @@ class FitnessTestEntry(models.Model):
     ]
 
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name="tests")
+    # Copy of student.school so tenant queries can use the indexes below
+    school = models.ForeignKey(School, on_delete=models.PROTECT, related_name="+")
     test_type = models.CharField(max_length=4, choices=TEST_TYPE_CHOICES)
 
     # Raw physical values (these feed your charts)
@@ -49,12 +93,25 @@ class FitnessTestEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantManager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["school", "created_at"], name="entry_school_created_idx"),
+            models.Index(
+                fields=["school", "test_type", "created_at"], name="entry_school_type_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.get_test_type_display()} ({self.created_at.date()})"
 
+    def save(self, *args, **kwargs):
+        if self.school_id is None:
+            self.school_id = self.student.school_id
+        super().save(*args, **kwargs)
+
 
 class Remark(models.Model):
     """
@@ -77,3 +134,38 @@ class Remark(models.Model):
     def __str__(self):
         who = self.author.username if self.author else "System"
         return f"Remark for {self.student} by {who} on {self.created_at.date()}"
+
+
+class OutlierFlag(models.Model):
+    """
+    A test value that is far from its peers (same school, section and age
+    band) and is probably a typo. Written by core.screening; each screening
+    run replaces the flags of the sections it covered.
+    """
+    entry = models.ForeignKey(FitnessTestEntry, on_delete=models.CASCADE, related_name="outlier_flags")
+    school = models.ForeignKey(School, on_delete=models.PROTECT, related_name="+")
+    section = models.CharField(max_length=50)
+    metric = models.CharField(max_length=20)
+
+    value = models.FloatField()
+    # Group median and robust spread the value was compared against
+    median = models.FloatField()
+    spread = models.FloatField()
+    score = models.FloatField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        # Most extreme first, whichever side of the median they are on.
+        ordering = ["section", Abs("score").desc()]
+        constraints = [
+            models.UniqueConstraint(fields=["entry", "metric"], name="unique_outlier_flag"),
+        ]
+        indexes = [
+            models.Index(fields=["school", "section"], name="outlier_school_section_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.entry.student} {self.metric}={self.value:g} (median {self.median:g})"
@@ -0,0 +1,226 @@
+"""
+On-demand request profiling for staff.
+
+A staff member arms a session on the custom admin page: the next LIMIT
+requests whose path matches PATTERN (``re.search``) run under cProfile in
+whichever worker serves them. Each captured request is dumped as a pstats
+file into PROFILE_DIR/<session id>/. The admin page merges a session's
+files into the top functions by cumulative and own time, and the merged
+stats can be downloaded for pstats or snakeviz.
+
+The armed session and its remaining-request counter live in the cache so
+every worker sees them. Workers re-read the session at most every
+POLL_INTERVAL seconds, so while nothing is armed a request costs one clock
+read. With REQUEST_PROFILING["ENABLED"] = False the middleware removes
+itself from the stack. cProfile and pstats are only imported once a
+request is actually profiled or a report is shown.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "POLL_INTERVAL": 1.0,
+    "MAX_REQUESTS": 100,
+}
+
+SESSION_KEY = "core:profiling:session"
+SESSION_ID_RE = re.compile(r"^\d{8}T\d{12}$")
+
+# (time of the next cache read, armed session or None) for this worker.
+_state = (0.0, None)
+_state_lock = threading.Lock()
+
+
+def profiling_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "REQUEST_PROFILING", {})}
+
+
+def profile_dir() -> Path:
+    return Path(getattr(settings, "PROFILE_DIR", settings.BASE_DIR / "profiles"))
+
+
+def _remaining_key(session_id) -> str:
+    return f"core:profiling:remaining:{session_id}"
+
+
+def _forget_local_state() -> None:
+    global _state
+    with _state_lock:
+        _state = (0.0, None)
+
+
+def active_session():
+    """The armed session as seen by this worker (refreshed every POLL_INTERVAL)."""
+
+    global _state
+    refresh_at, session = _state
+    now = time.monotonic()
+    if now < refresh_at:
+        return session
+    session = cache.get(SESSION_KEY)
+    if session is not None:
+        session = {**session, "regex": re.compile(session["pattern"])}
+    with _state_lock:
+        _state = (now + profiling_settings()["POLL_INTERVAL"], session)
+    return session
+
+
+def start_session(pattern: str, limit: int, user=None) -> str:
+    """Arm profiling of the next ``limit`` requests matching ``pattern``."""
+
+    re.compile(pattern)  # raises re.error for invalid patterns
+    session_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    meta = {
+        "id": session_id,
+        "pattern": pattern,
+        "limit": limit,
+        "user": getattr(user, "username", None),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    }
+    directory = profile_dir() / session_id
+    directory.mkdir(parents=True)
+    (directory / "meta.json").write_text(json.dumps(meta))
+
+    cache.set(_remaining_key(session_id), limit, None)
+    cache.set(SESSION_KEY, meta, None)
+    _forget_local_state()
+    return session_id
+
+
+def stop_session() -> None:
+    session = cache.get(SESSION_KEY)
+    cache.delete(SESSION_KEY)
+    if session is not None:
+        cache.delete(_remaining_key(session["id"]))
+    _forget_local_state()
+
+
+def _claim(session) -> bool:
+    """Take one of the session's remaining requests, across all workers."""
+
+    try:
+        remaining = cache.decr(_remaining_key(session["id"]))
+    except ValueError:
+        return False  # stopped, or finished by another worker
+    if remaining <= 0:
+        stop_session()
+    return remaining >= 0
+
+
+def profile_request(session, get_response, request):
+    """Run ``get_response(request)`` under cProfile and store the stats."""
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active in this thread.
+        return get_response(request)
+    try:
+        return get_response(request)
+    finally:
+        profiler.disable()
+        path = profile_dir() / session["id"] / f"{os.getpid()}-{time.time_ns()}.prof"
+        try:
+            profiler.dump_stats(path)
+        except OSError:
+            logger.exception("Could not store profile of %s", request.path)
+
+
+def maybe_profile(get_response, request):
+    session = active_session()
+    if session is None or not session["regex"].search(request.path) or not _claim(session):
+        return get_response(request)
+    return profile_request(session, get_response, request)
+
+
+def _profile_files(session_id):
+    if not SESSION_ID_RE.match(session_id):
+        raise FileNotFoundError(session_id)
+    return sorted((profile_dir() / session_id).glob("*.prof"))
+
+
+def list_sessions() -> list:
+    """Stored sessions, newest first, with the number of captured requests."""
+
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    sessions = []
+    for path in sorted(directory.iterdir(), reverse=True):
+        meta_path = path / "meta.json"
+        if path.is_dir() and SESSION_ID_RE.match(path.name) and meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            meta["captured"] = len(list(path.glob("*.prof")))
+            sessions.append(meta)
+    return sessions
+
+
+def load_stats(session_id):
+    """Merged pstats.Stats of a session, or None if nothing was captured."""
+
+    import pstats
+
+    files = _profile_files(session_id)
+    if not files:
+        return None
+    return pstats.Stats(*map(str, files))
+
+
+def top_functions(stats, sort="cumulative", limit=25) -> list:
+    """Rows for the ``limit`` functions with the highest ``sort`` time."""
+
+    import pstats
+
+    column = {"cumulative": 3, "self": 2}[sort]
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][column], reverse=True)
+    return [
+        {
+            "function": pstats.func_std_string(func),
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "self_ms": self_time * 1000,
+            "cumulative_ms": cumulative * 1000,
+        }
+        for func, (primitive_calls, calls, self_time, cumulative, _) in rows[:limit]
+    ]
+
+
+def session_report(session_id, limit=25):
+    stats = load_stats(session_id)
+    if stats is None:
+        return None
+    return {
+        "total_ms": stats.total_tt * 1000,
+        "cumulative": top_functions(stats, "cumulative", limit),
+        "self": top_functions(stats, "self", limit),
+    }
+
+
+def merged_stats_bytes(session_id) -> bytes:
+    """The session's merged stats in pstats' marshal format."""
+
+    import tempfile
+
+    stats = load_stats(session_id)
+    if stats is None:
+        raise FileNotFoundError(session_id)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "merged.prof"
+        stats.dump_stats(path)
+        return path.read_bytes()
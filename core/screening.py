@@ -0,0 +1,174 @@
+"""
+Robust outlier screening of FitnessTestEntry values.
+
+Typos such as a flexibility of 450 instead of 45 skew class analytics, so
+every metric of an entry is compared with its peers: the entries of the same
+school and section whose students fall into the same age band
+(``age // AGE_BAND``). Within such a group the robust z-score is
+
+    score = (value - median) / (1.4826 * MAD)
+
+with the mean absolute deviation (times 1.2533) standing in when more than
+half of the values are identical and the MAD is 0. Values with
+``|score| > THRESHOLD`` are stored as OutlierFlag rows; groups with fewer
+than MIN_GROUP_SIZE valid values are not screened.
+
+A run loads the requested sections in one query, sorts the rows by
+(section, age band) and computes the statistics of all metrics of a group
+with NumPy, so the only Python loop is over groups, not rows. After test
+entries are saved the affected sections are re-screened on a background
+thread, DELAY seconds after the first save of a burst (see core.debounce).
+NumPy is only imported by the first run, not when core.signals loads this
+module at startup.
+"""
+
+import warnings
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .debounce import Debouncer
+from .models import METRIC_FIELDS, OutlierFlag
+
+DEFAULTS = {
+    "ENABLED": True,
+    "THRESHOLD": 3.5,
+    "MIN_GROUP_SIZE": 8,
+    "AGE_BAND": 2,
+    "DELAY": 2.0,
+}
+
+# Scale factors that make MAD / mean absolute deviation estimate the
+# standard deviation of normally distributed values.
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+
+
+def screening_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "OUTLIER_SCREENING", {})}
+
+
+def _metric_sql(field: str) -> str:
+    return f"CASE WHEN typeof(e.{field}) IN ('integer', 'real') THEN e.{field} END"
+
+
+def _fetch(school_id, sections=None):
+    query = f"""
+        SELECT e.id, p.section, p.age, {", ".join(_metric_sql(field) for field in METRIC_FIELDS)}
+        FROM core_fitnesstestentry e
+        JOIN core_studentprofile p ON p.id = e.student_id
+        WHERE e.school_id = %s
+    """
+    params = [school_id]
+    if sections is not None:
+        query += f" AND p.section IN ({', '.join(['%s'] * len(sections))})"
+        params.extend(sections)
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+
+def find_outliers(groups, values, threshold=3.5, min_group_size=8):
+    """
+    Score ``values`` (rows x metrics, NaN for missing) against the other rows
+    with the same ``groups`` code. Returns ``(rows, metrics, medians,
+    spreads, scores)`` arrays describing the flagged cells.
+    """
+
+    import numpy as np
+
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    values = values[order]
+    bounds = np.flatnonzero(np.diff(sorted_groups)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(order)]))
+
+    medians = np.full_like(values, np.nan)
+    spreads = np.full_like(values, np.nan)
+    with warnings.catch_warnings():
+        # All-NaN columns are expected (and masked by min_group_size below).
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for start, end in zip(starts, ends):
+            if end - start < min_group_size:
+                continue
+            block = values[start:end]
+            median = np.nanmedian(block, axis=0)
+            deviation = np.abs(block - median)
+            spread = MAD_SCALE * np.nanmedian(deviation, axis=0)
+            spread = np.where(spread > 0, spread, MEAN_AD_SCALE * np.nanmean(deviation, axis=0))
+            spread[np.count_nonzero(~np.isnan(block), axis=0) < min_group_size] = np.nan
+            medians[start:end] = median
+            spreads[start:end] = spread
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (values - medians) / spreads
+    rows, metrics = np.nonzero(np.abs(scores) > threshold)
+    return order[rows], metrics, medians[rows, metrics], spreads[rows, metrics], scores[rows, metrics]
+
+
+def screen(school_id, sections=None) -> int:
+    """
+    Re-screen the given sections (all sections when None) of one school and
+    replace their OutlierFlag rows. Returns the number of flags written.
+    """
+
+    config = screening_settings()
+    rows = _fetch(school_id, sections)
+
+    flags = []
+    if rows:
+        import numpy as np
+
+        data = np.array(rows, dtype=object)
+        entry_ids = data[:, 0].astype(np.int64)
+        section_names, section_codes = np.unique(data[:, 1].astype(str), return_inverse=True)
+        bands = data[:, 2].astype(np.int64) // config["AGE_BAND"]
+        values = data[:, 3:].astype(np.float64)
+
+        groups = section_codes.astype(np.int64) * (bands.max() + 1) + bands
+        found = find_outliers(groups, values, config["THRESHOLD"], config["MIN_GROUP_SIZE"])
+        for row, metric, median, spread, score in zip(*found):
+            flags.append(OutlierFlag(
+                entry_id=int(entry_ids[row]),
+                school_id=school_id,
+                section=section_names[section_codes[row]],
+                metric=METRIC_FIELDS[metric],
+                value=float(values[row, metric]),
+                median=float(median),
+                spread=float(spread),
+                score=float(score),
+            ))
+
+    with transaction.atomic():
+        stale = OutlierFlag.objects.filter(school_id=school_id)
+        if sections is not None:
+            stale = stale.filter(section__in=sections)
+        stale.delete()
+        OutlierFlag.objects.bulk_create(flags, batch_size=500)
+    return len(flags)
+
+
+def _screen_keys(keys):
+    by_school = {}
+    for school_id, section in keys:
+        by_school.setdefault(school_id, set()).add(section)
+    for school_id, sections in by_school.items():
+        screen(school_id, sorted(sections))
+
+
+_debouncer = None
+
+
+def get_debouncer() -> Debouncer:
+    global _debouncer
+    if _debouncer is None:
+        _debouncer = Debouncer(_screen_keys, screening_settings()["DELAY"], "outlier-screening")
+    return _debouncer
+
+
+def schedule_screening(school_id, section) -> None:
+    """Re-screen one section in the background once the current transaction commits."""
+
+    if school_id is not None and section is not None and screening_settings()["ENABLED"]:
+        get_debouncer().schedule((school_id, section))
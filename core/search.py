@@ -0,0 +1,117 @@
+"""
+Full-text search over Remark history.
+
+Remark.text is indexed by the SQLite FTS5 table ``core_remark_fts`` (created
+in migration 0003). Triggers on core_remark keep it in sync for every
+insert/update/delete, including bulk operations that bypass signals.
+"""
+
+import math
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+
+from .models import Remark
+
+FTS_TABLE = "core_remark_fts"
+OPERATORS = {"OR", "AND", "NOT"}
+# Private-use characters FTS5 puts around matches; replaced with <mark>
+# only after the remark text has been escaped.
+MATCH_START = "\ue000"
+MATCH_END = "\ue001"
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn user input into an FTS5 query: each word is quoted (so punctuation
+    is not parsed as syntax) and prefix-matched. Upper-case OR/AND/NOT stay
+    operators, and words are ANDed otherwise.
+    """
+
+    terms = []
+    for word in text.split():
+        if word in OPERATORS:
+            if terms and terms[-1] not in OPERATORS:
+                terms.append(word)
+            continue
+        terms.append('"%s"*' % word.replace('"', '""'))
+    while terms and terms[-1] in OPERATORS:
+        terms.pop()
+    return " ".join(terms)
+
+
+def highlight(snippet: str) -> SafeString:
+    """Escape an FTS5 snippet and turn its match markers into <mark> tags."""
+
+    html = escape(snippet).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+    return mark_safe(html)
+
+
+def search_remarks(text: str, school=None, page: int = 1, per_page: int = 20) -> dict:
+    """
+    Return one page of remarks matching ``text``, best matches first,
+    optionally limited to students of ``school`` (School or id).
+
+    ``results`` holds Remark instances with ``student`` and ``author``
+    already loaded, each with an extra ``snippet`` attribute: the
+    HTML-escaped remark text (a SafeString) with matches wrapped in
+    <mark>...</mark>.
+    """
+
+    query = fts_query(text)
+    empty = {"results": [], "total": 0, "page": 1, "num_pages": 0, "per_page": per_page}
+    if not query:
+        return empty
+
+    sql = f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+    params = [query]
+    if school is not None:
+        sql += """ AND rowid IN (
+            SELECT r.id FROM core_remark r
+            JOIN core_studentprofile p ON p.id = r.student_id
+            WHERE p.school_id = %s
+        )"""
+        params.append(getattr(school, "pk", school))
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) {sql}", params)
+        total = cursor.fetchone()[0]
+        if not total:
+            return empty
+
+        num_pages = math.ceil(total / per_page)
+        page = min(max(1, page), num_pages)
+        cursor.execute(
+            f"""
+            SELECT rowid, snippet({FTS_TABLE}, 0, '{MATCH_START}', '{MATCH_END}', '…', 16)
+            {sql}
+            ORDER BY rank
+            LIMIT %s OFFSET %s
+            """,
+            [*params, per_page, (page - 1) * per_page],
+        )
+        hits = cursor.fetchall()
+
+    remarks = Remark.objects.select_related("student", "author").in_bulk(
+        [remark_id for remark_id, _ in hits]
+    )
+    results = []
+    for remark_id, snippet in hits:
+        remark = remarks.get(remark_id)
+        if remark is not None:
+            remark.snippet = highlight(snippet)
+            results.append(remark)
+
+    return {
+        "results": results,
+        "total": total,
+        "page": page,
+        "num_pages": num_pages,
+        "per_page": per_page,
+    }
+
+
+def rebuild_remark_index() -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .activity import record_activity
+from .cache import invalidate_profile, invalidate_user
+from .fragments import schedule_render
+from .leaderboards import refresh_student
+from .models import FitnessTestEntry, Remark, School, StudentProfile
+from .screening import schedule_screening
+from .tenancy import forget_school
+from .throttle import forget_unknown_username
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    forget_unknown_username(instance.get_username())
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def drop_cached_profile(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=School)
+def drop_cached_school(sender, instance, **kwargs):
+    forget_school(instance)
+
+
+# Profile fields shown on or used to scope the leaderboards.
+RANKED_PROFILE_FIELDS = {"full_name", "school", "school_id", "section"}
+# Profile fields copied into the metric snapshot (see core.snapshot).
+SNAPSHOT_PROFILE_FIELDS = {"school", "school_id", "section", "age"}
+
+
+@receiver([post_save, post_delete], sender=FitnessTestEntry)
+def rerank_student(sender, instance, **kwargs):
+    refresh_student(instance.student_id)
+
+
+def student_section(instance):
+    """Section of the student a FitnessTestEntry or Remark belongs to."""
+
+    if type(instance).student.is_cached(instance):
+        return instance.student.section
+    # None when the whole profile is being deleted.
+    return StudentProfile.objects.filter(pk=instance.student_id).values_list("section", flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=FitnessTestEntry)
+def entry_changed(sender, instance, created=False, **kwargs):
+    if created:
+        record_activity(instance.student_id, instance.created_at)
+    section = student_section(instance)
+    schedule_screening(instance.school_id, section)
+    schedule_render(instance.school_id, section)
+
+
+@receiver([post_save, post_delete], sender=Remark)
+def remark_changed(sender, instance, **kwargs):
+    if type(instance).student.is_cached(instance):
+        school_id = instance.student.school_id
+    else:
+        school_id = (
+            StudentProfile.objects.filter(pk=instance.student_id).values_list("school_id", flat=True).first()
+        )
+    schedule_render(school_id, student_section(instance))
+
+
+@receiver(pre_save, sender=StudentProfile)
+def remember_previous_section(sender, instance, update_fields=None, **kwargs):
+    tracked = RANKED_PROFILE_FIELDS | SNAPSHOT_PROFILE_FIELDS
+    if instance.pk and (update_fields is None or tracked & set(update_fields)):
+        row = (
+            StudentProfile.objects.filter(pk=instance.pk)
+            .values_list("school_id", "section", "age")
+            .first()
+        )
+        instance._previous_section = row[:2] if row else None
+        instance._previous_age = row[2] if row else None
+
+
+@receiver(post_save, sender=StudentProfile)
+def rerank_profile(sender, instance, created, **kwargs):
+    if created or not hasattr(instance, "_previous_section"):
+        return
+    previous = instance.__dict__.pop("_previous_section")
+    previous_age = instance.__dict__.pop("_previous_age", None)
+    if previous and (previous != (instance.school_id, instance.section) or previous_age != instance.age):
+        # Keep the denormalized FitnessTestEntry.school in step with the
+        # profile, and bump updated_at so the incremental snapshot build
+        # re-exports the entries with the new school, section and age.
+        FitnessTestEntry.objects.filter(student=instance).update(
+            school_id=instance.school_id, updated_at=timezone.now()
+        )
+    refresh_student(instance.pk, previous=previous)
+    if previous and previous != (instance.school_id, instance.section):
+        schedule_screening(*previous)
+        schedule_render(*previous)
+
+
+@receiver(post_save, sender=StudentProfile)
+def profile_changed(sender, instance, created, **kwargs):
+    # Age and section decide which peers the student's entries are compared with.
+    if not created:
+        schedule_screening(instance.school_id, instance.section)
+    schedule_render(instance.school_id, instance.section)
+
+
+@receiver(post_delete, sender=StudentProfile)
+def profile_deleted(sender, instance, **kwargs):
+    schedule_render(instance.school_id, instance.section)
@@ -0,0 +1,324 @@
+"""
+Columnar, memory-mapped snapshot of FitnessTestEntry metrics.
+
+School-wide analytics (distributions, per-section aggregates) would
+otherwise have to load every FitnessTestEntry and convert each Decimal. The
+snapshot stores one typed NumPy array per column on disk:
+
+    entry_id, student_id, school, section, age, test_type, created_at, <METRIC_FIELDS>
+
+``school`` is the School id. Sections are dictionary-encoded by name
+(codes index ``meta["sections"]``; the same name in two schools shares a
+code, so filter by ``school`` as well),
+``created_at`` is Unix seconds and metrics are float32 with NaN for values
+that are not valid numbers. Each build writes a new generation directory
+and then atomically repoints ``CURRENT``, so readers never see a
+half-written snapshot.
+
+``build_snapshot()`` is incremental: only rows whose ``updated_at`` is newer
+than the previous build's watermark minus WATERMARK_OVERLAP are read from
+the database. ``updated_at`` is set before the row commits, so a write that
+waited for SQLite's lock (or sat in an ingest batch) can commit after a
+build with an older timestamp; re-reading the overlap window picks it up,
+and re-read rows replace their old copies by entry id. Deleted entries are
+dropped by comparing ids. ``age`` and ``section`` are copied from the
+profile when the row is exported; saving a profile with a new school,
+section or age bumps its entries' ``updated_at`` (see core.signals), but
+use ``full=True`` after queryset-level ``update()`` edits of profiles.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from .models import METRIC_FIELDS
+
+TEST_TYPE_CODES = {"pre": 0, "post": 1}
+# Bump when the column layout changes; older snapshots are rebuilt in full.
+SNAPSHOT_VERSION = 2
+
+COLUMN_DTYPES = {
+    "entry_id": np.int64,
+    "student_id": np.int64,
+    "school": np.int32,
+    "section": np.int32,
+    "age": np.int16,
+    "test_type": np.int8,
+    "created_at": np.int64,
+    **{field: np.float32 for field in METRIC_FIELDS},
+}
+
+FETCH_SIZE = 10_000
+
+# Seconds before the watermark that incremental builds read again.
+WATERMARK_OVERLAP = getattr(settings, "METRIC_SNAPSHOT_OVERLAP", 300)
+
+
+def snapshot_dir() -> Path:
+    return Path(getattr(settings, "METRIC_SNAPSHOT_DIR", settings.BASE_DIR / "snapshots"))
+
+
+def _metric_sql(field: str) -> str:
+    # Invalid values (see views.latest_valid_entry) become NULL -> NaN.
+    return f"CASE WHEN typeof(e.{field}) IN ('integer', 'real') THEN e.{field} END"
+
+
+def _fetch_rows(since=None):
+    query = f"""
+        SELECT
+            e.id,
+            e.student_id,
+            e.school_id,
+            p.section,
+            p.age,
+            e.test_type,
+            CAST(strftime('%%s', e.created_at) AS INTEGER),
+            {", ".join(_metric_sql(field) for field in METRIC_FIELDS)},
+            CAST(e.updated_at AS TEXT)
+        FROM core_fitnesstestentry e
+        JOIN core_studentprofile p ON p.id = e.student_id
+    """
+    params = []
+    if since:
+        query += " WHERE e.updated_at >= %s"
+        start = datetime.fromisoformat(since) - timedelta(seconds=WATERMARK_OVERLAP)
+        params.append(start.isoformat(sep=" "))
+    query += " ORDER BY e.id"
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+
+
+def _rows_to_columns(rows, sections):
+    section_codes = {name: code for code, name in enumerate(sections)}
+    count = len(rows)
+    columns = {name: np.empty(count, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+    watermark = None
+
+    for i, row in enumerate(rows):
+        entry_id, student_id, school_id, section, age, test_type, created_at, *rest = row
+        *metrics, updated_at = rest
+        if section not in section_codes:
+            section_codes[section] = len(sections)
+            sections.append(section)
+        columns["entry_id"][i] = entry_id
+        columns["student_id"][i] = student_id
+        columns["school"][i] = school_id
+        columns["section"][i] = section_codes[section]
+        columns["age"][i] = age
+        columns["test_type"][i] = TEST_TYPE_CODES.get(test_type, -1)
+        columns["created_at"][i] = created_at or 0
+        for field, value in zip(METRIC_FIELDS, metrics):
+            columns[field][i] = np.nan if value is None else value
+        watermark = updated_at if watermark is None else max(watermark, updated_at)
+
+    return columns, watermark
+
+
+def _current_generation(directory: Path):
+    try:
+        return (directory / "CURRENT").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_generation(directory: Path, columns, meta) -> None:
+    generation = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    target = directory / generation
+    target.mkdir(parents=True)
+    for name, values in columns.items():
+        np.save(target / f"{name}.npy", values)
+    (target / "meta.json").write_text(json.dumps(meta))
+
+    pointer = directory / "CURRENT.tmp"
+    pointer.write_text(generation)
+    previous = _current_generation(directory)
+    os.replace(pointer, directory / "CURRENT")
+
+    # Keep the previous generation around for readers that still map it.
+    for child in directory.iterdir():
+        if child.is_dir() and child.name not in (generation, previous):
+            shutil.rmtree(child, ignore_errors=True)
+
+
+def _already_exported(previous, changed) -> bool:
+    """Whether every re-read row is in ``previous`` with the same values."""
+
+    old_ids = previous.columns["entry_id"]
+    ids = changed["entry_id"]
+    if not ids.size:
+        return True
+    if not old_ids.size:
+        return False
+    order = np.argsort(old_ids)
+    found = order[np.searchsorted(old_ids, ids, sorter=order).clip(max=old_ids.size - 1)]
+    if not (old_ids[found] == ids).all():
+        return False
+    return all(
+        np.array_equal(previous.columns[name][found], changed[name], equal_nan=changed[name].dtype.kind == "f")
+        for name in COLUMN_DTYPES
+    )
+
+
+def build_snapshot(directory=None, full=False) -> dict:
+    """
+    Bring the on-disk snapshot up to date and return its metadata.
+    """
+
+    directory = Path(directory) if directory else snapshot_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    previous = None if full else MetricSnapshot.open(directory, missing_ok=True)
+    sections = list(previous.sections) if previous else []
+    since = previous.meta["watermark"] if previous else None
+
+    changed, watermark = _rows_to_columns(list(_fetch_rows(since)), sections)
+
+    if previous is None:
+        columns = changed
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM core_fitnesstestentry")
+            live_ids = np.fromiter((row[0] for row in cursor.fetchall()), dtype=np.int64)
+        old_ids = previous.columns["entry_id"]
+        live = np.isin(old_ids, live_ids)
+        if live.all() and _already_exported(previous, changed):
+            return previous.meta
+        keep = live & ~np.isin(old_ids, changed["entry_id"])
+        columns = {
+            name: np.concatenate([previous.columns[name][keep], changed[name]])
+            for name in COLUMN_DTYPES
+        }
+        watermark = max(watermark or since, since)
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "rows": int(columns["entry_id"].size),
+        "sections": sections,
+        "watermark": watermark,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+    }
+    _write_generation(directory, columns, meta)
+    return meta
+
+
+class MetricSnapshot:
+    """
+    Read-only view over the latest snapshot. Columns are memory-mapped, so
+    opening is cheap and only the pages a query touches are read.
+
+    Filters accepted by the query methods:
+    ``school`` (School or id), ``section`` (name or list of names), ``age`` (int or list),
+    ``min_age`` / ``max_age``, ``test_type`` ("pre"/"post"),
+    ``since`` / ``until`` (datetimes, inclusive / exclusive).
+    """
+
+    def __init__(self, path: Path, meta: dict):
+        self.path = path
+        self.meta = meta
+        self.sections = meta["sections"]
+        self.columns = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COLUMN_DTYPES
+        }
+
+    @classmethod
+    def open(cls, directory=None, missing_ok=False):
+        directory = Path(directory) if directory else snapshot_dir()
+        generation = _current_generation(directory)
+        if generation is None:
+            if missing_ok:
+                return None
+            raise FileNotFoundError(f"No metric snapshot in {directory}; run build_metric_snapshot.")
+        path = directory / generation
+        meta = json.loads((path / "meta.json").read_text())
+        if meta.get("version") != SNAPSHOT_VERSION:
+            if missing_ok:
+                return None
+            raise FileNotFoundError(f"Metric snapshot in {directory} is outdated; rebuild it.")
+        return cls(path, meta)
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def mask(self, school=None, section=None, age=None, min_age=None, max_age=None,
+             test_type=None, since=None, until=None):
+        cols = self.columns
+        selected = np.ones(len(self), dtype=bool)
+
+        if school is not None:
+            selected &= cols["school"] == getattr(school, "pk", school)
+        if section is not None:
+            names = [section] if isinstance(section, str) else list(section)
+            codes = [self.sections.index(name) for name in names if name in self.sections]
+            selected &= np.isin(cols["section"], codes)
+        if age is not None:
+            selected &= np.isin(cols["age"], np.atleast_1d(age))
+        if min_age is not None:
+            selected &= cols["age"] >= min_age
+        if max_age is not None:
+            selected &= cols["age"] <= max_age
+        if test_type is not None:
+            selected &= cols["test_type"] == TEST_TYPE_CODES[test_type]
+        if since is not None:
+            selected &= cols["created_at"] >= int(since.timestamp())
+        if until is not None:
+            selected &= cols["created_at"] < int(until.timestamp())
+        return selected
+
+    def values(self, metric: str, **filters) -> np.ndarray:
+        """Valid (non-NaN) values of ``metric`` for the matching rows."""
+
+        if metric not in METRIC_FIELDS:
+            raise ValueError(f"Unknown metric {metric!r}.")
+        column = self.columns[metric][self.mask(**filters)]
+        return column[~np.isnan(column)]
+
+    def aggregate(self, metric: str, **filters) -> dict:
+        values = self.values(metric, **filters)
+        if not values.size:
+            return {"count": 0}
+        p25, median, p75 = np.percentile(values, [25, 50, 75])
+        return {
+            "count": int(values.size),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "p25": float(p25),
+            "median": float(median),
+            "p75": float(p75),
+            "max": float(values.max()),
+        }
+
+    def histogram(self, metric: str, bins=20, range=None, **filters):
+        """Return ``(counts, bin_edges)`` as plain lists."""
+
+        counts, edges = np.histogram(self.values(metric, **filters), bins=bins, range=range)
+        return counts.tolist(), edges.tolist()
+
+    def aggregate_by_section(self, metric: str, **filters) -> dict:
+        """Mean and count of ``metric`` per section, in one vectorized pass."""
+
+        selected = self.mask(**filters)
+        values = self.columns[metric][selected]
+        codes = self.columns["section"][selected]
+        valid = ~np.isnan(values)
+        values, codes = values[valid], codes[valid]
+
+        counts = np.bincount(codes, minlength=len(self.sections))
+        sums = np.bincount(codes, weights=values, minlength=len(self.sections))
+        return {
+            name: {"count": int(counts[code]), "mean": float(sums[code] / counts[code])}
+            for code, name in enumerate(self.sections)
+            if counts[code]
+        }
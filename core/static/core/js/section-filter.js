@@ -0,0 +1,5 @@
+// The section <option>s are a cached fragment shared by every request, so the
+// current choice is applied here instead of in the markup.
+document.querySelectorAll("select[data-selected]").forEach(function (select) {
+  select.value = select.dataset.selected;
+});
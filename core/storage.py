@@ -0,0 +1,72 @@
+import gzip
+import re
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt")
+MIN_COMPRESS_SIZE = 256
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet."""
+
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    # Spaces before ":" are kept since "a :hover" and "a:hover" differ.
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that minifies CSS before it is hashed and
+    writes pre-compressed ``.gz`` (and ``.br`` when brotli is installed)
+    siblings of every hashed text asset, for core.assets.serve or the
+    front-end web server to pick up.
+    """
+
+    def stored_name(self, name):
+        # Without a manifest (collectstatic has not run: development, tests)
+        # fall back to the plain name instead of raising.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def _save(self, name, content):
+        if name.endswith(".css"):
+            content.seek(0)
+            content = ContentFile(minify_css(content.read().decode("utf-8")).encode("utf-8"))
+        return super()._save(name, content)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self._save_compressed(hashed_name)
+
+    def _save_compressed(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+
+        variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(data)
+
+        for suffix, compressed in variants.items():
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            super()._save(name + suffix, ContentFile(compressed))
@@ -0,0 +1,53 @@
+"""
+Mapping requests to schools (tenants).
+
+Each School may have a ``domain``; requests for that host belong to it and
+every other host falls back to the school named by settings.DEFAULT_SCHOOL_SLUG.
+Lookups are cached per host so resolving the tenant costs no queries on
+the hot path.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import AUTH_CACHE_TIMEOUT
+from .models import School
+
+
+def default_school_slug() -> str:
+    return getattr(settings, "DEFAULT_SCHOOL_SLUG", "default")
+
+
+def get_default_school() -> School:
+    key = "core:school:default"
+    school = cache.get(key)
+    if school is None:
+        school, _ = School.objects.get_or_create(
+            slug=default_school_slug(), defaults={"name": "Default school"}
+        )
+        cache.set(key, school, AUTH_CACHE_TIMEOUT)
+    return school
+
+
+def host_cache_key(host: str) -> str:
+    return f"core:school:host:{host.lower()}"
+
+
+def school_for_host(host: str) -> School:
+    key = host_cache_key(host)
+    school = cache.get(key)
+    if school is None:
+        school = School.objects.filter(domain__iexact=host).first() or get_default_school()
+        cache.set(key, school, AUTH_CACHE_TIMEOUT)
+    return school
+
+
+def school_for_request(request) -> School:
+    return school_for_host(request.get_host().split(":")[0])
+
+
+def forget_school(school: School) -> None:
+    keys = ["core:school:default"]
+    if school.domain:
+        keys.append(host_cache_key(school.domain))
+    cache.delete_many(keys)
@@ -1,3 +1,86 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .models import School, StudentProfile
+
+TEST_SETTINGS = {
+    "ALLOWED_HOSTS": ["*"],
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    "PASSWORD_HASHERS": ["django.contrib.auth.hashers.MD5PasswordHasher"],
+    "ACTIVITY_TRACKING": {"ENABLED": False},
+}
+
+PASSWORD = "test-pass-123"
+
+
+@override_settings(**TEST_SETTINGS)
+class TenantTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.school_a = School.objects.create(slug="a", name="School A", domain="a.example.com")
+        self.school_b = School.objects.create(slug="b", name="School B", domain="b.example.com")
+        self.student_a = self.create_student("alice", self.school_a)
+        self.create_student("bob", self.school_b)
+
+    def create_student(self, username, school, staff=False):
+        user = User.objects.create_user(username=username, password=PASSWORD, is_staff=staff)
+        StudentProfile.objects.create(user=user, school=school, full_name=username.title(), age=14, section="10-A")
+        return user
+
+    def login(self, username, host, password=PASSWORD):
+        return self.client.post(
+            reverse("login"), {"username": username, "password": password}, HTTP_HOST=host
+        )
+
+
+class CrossSchoolAccessTests(TenantTestCase):
+    def test_login_on_other_schools_host_is_rejected(self):
+        response = self.login("alice", "b.example.com")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "This account belongs to another school.")
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+    def test_login_on_own_schools_host_succeeds(self):
+        response = self.login("alice", "a.example.com")
+
+        self.assertRedirects(response, reverse("pre_test_form"), fetch_redirect_response=False)
+
+    def test_school_pages_on_other_schools_host_are_forbidden(self):
+        self.client.force_login(self.student_a)
+        urls = [
+            reverse("class_analytics"),
+            reverse("leaderboard", args=["vo2_max"]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, HTTP_HOST="a.example.com").status_code, 200)
+                self.assertEqual(self.client.get(url, HTTP_HOST="b.example.com").status_code, 403)
+
+    def test_roster_on_other_schools_host_is_forbidden_for_staff(self):
+        teacher = self.create_student("teacher", self.school_a, staff=True)
+        self.client.force_login(teacher)
+        url = reverse("student_management")
+
+        self.assertEqual(self.client.get(url, HTTP_HOST="a.example.com").status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_HOST="b.example.com").status_code, 403)
+
+
+class LoginThrottleTests(TenantTestCase):
+    def test_unknown_username_is_throttled_after_five_failures(self):
+        for _ in range(5):
+            response = self.login("nobody", "a.example.com", password="wrong")
+            self.assertContains(response, "Invalid username or password.")
+
+        response = self.login("nobody", "a.example.com", password="wrong")
+        self.assertContains(response, "Too many login attempts.")
+
+    def test_known_username_is_throttled_after_five_failures(self):
+        for _ in range(5):
+            self.login("alice", "a.example.com", password="wrong")
+
+        response = self.login("alice", "a.example.com")
+        self.assertContains(response, "Too many login attempts.")
+        self.assertNotIn("_auth_user_id", self.client.session)
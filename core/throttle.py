@@ -0,0 +1,136 @@
+"""
+Login throttling.
+
+PBKDF2 hashing inside authenticate() is the most CPU-expensive thing the app
+does, so StudentLoginForm rejects requests here *before* hashing:
+
+* a sliding window of attempts per client IP,
+* a sliding window of failed attempts per username,
+* a short-lived negative cache of usernames that do not exist. Hits sleep for
+  as long as the original (hashing) authenticate() call took, so the
+  response time does not reveal whether a username exists, but no CPU is
+  spent on it.
+
+All state lives in the default cache.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_RATES = {
+    "ip": (120, 60),
+    "username": (5, 300),
+}
+UNKNOWN_USERNAME_TIMEOUT = 300
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+class SlidingWindowThrottle:
+    """Allow at most ``limit`` hits per ``window`` seconds for each identifier."""
+
+    def __init__(self, scope: str, limit: int, window: int):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def cache_key(self, ident: str) -> str:
+        return f"core:throttle:{self.scope}:{_digest(ident)}"
+
+    def _recent(self, ident: str, now: float):
+        return [t for t in cache.get(self.cache_key(ident), []) if t > now - self.window]
+
+    def retry_after(self, ident: str, now=None) -> int:
+        """Seconds until ``ident`` may try again, or 0 if it is not limited."""
+
+        now = time.time() if now is None else now
+        recent = self._recent(ident, now)
+        if len(recent) < self.limit:
+            return 0
+        return max(1, int(recent[-self.limit] + self.window - now) + 1)
+
+    def hit(self, ident: str, now=None) -> None:
+        now = time.time() if now is None else now
+        recent = self._recent(ident, now)
+        recent.append(now)
+        cache.set(self.cache_key(ident), recent[-self.limit:], self.window)
+
+    def reset(self, ident: str) -> None:
+        cache.delete(self.cache_key(ident))
+
+
+def _throttle(scope: str) -> SlidingWindowThrottle:
+    rates = getattr(settings, "LOGIN_THROTTLE_RATES", DEFAULT_RATES)
+    limit, window = rates.get(scope, DEFAULT_RATES[scope])
+    return SlidingWindowThrottle(f"login-{scope}", limit, window)
+
+
+def client_ip(request) -> str:
+    """
+    The client address used for the per-IP limit. With
+    LOGIN_THROTTLE_IP_HEADER set (e.g. "HTTP_X_FORWARDED_FOR"), the entry
+    added by the outermost of LOGIN_THROTTLE_TRUSTED_PROXIES proxies is used,
+    so clients cannot pick their own address by sending the header.
+    """
+
+    if request is None:
+        return ""
+    header = getattr(settings, "LOGIN_THROTTLE_IP_HEADER", None)
+    if header and request.META.get(header):
+        addresses = [part.strip() for part in request.META[header].split(",") if part.strip()]
+        proxies = max(1, getattr(settings, "LOGIN_THROTTLE_TRUSTED_PROXIES", 1))
+        if addresses:
+            return addresses[-min(proxies, len(addresses))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def check_login_allowed(request, username: str) -> int:
+    """
+    Record the attempt against the client IP and return how many seconds the
+    caller must wait (0 if the attempt may proceed).
+    """
+
+    ip_throttle = _throttle("ip")
+    ip = client_ip(request)
+    wait = max(ip_throttle.retry_after(ip), _throttle("username").retry_after(username))
+    if not wait:
+        ip_throttle.hit(ip)
+    return wait
+
+
+def login_failed(username: str) -> None:
+    _throttle("username").hit(username)
+
+
+def login_succeeded(username: str) -> None:
+    _throttle("username").reset(username)
+
+
+def unknown_username_key(username: str) -> str:
+    return f"core:login:unknown:{_digest(username)}"
+
+
+def remember_unknown_username(username: str, elapsed: float) -> None:
+    cache.set(unknown_username_key(username), elapsed, UNKNOWN_USERNAME_TIMEOUT)
+
+
+def forget_unknown_username(username: str) -> None:
+    cache.delete(unknown_username_key(username))
+
+
+def reject_if_unknown_username(username: str) -> bool:
+    """
+    Return True (after waiting as long as a real check would take) if the
+    username is known not to exist.
+    """
+
+    elapsed = cache.get(unknown_username_key(username))
+    if elapsed is None:
+        return False
+    time.sleep(elapsed)
+    return True
@@ -2,28 +2,84 @@ from decimal import Decimal, InvalidOperation
 from typing import List, Optional
 
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model, login, logout
 from django.contrib.auth.decorators import login_required
-from django.core.management import call_command
+from django.core.exceptions import PermissionDenied
 from django.db import connection
 from django.db.utils import OperationalError
-from django.shortcuts import get_object_or_404, redirect, render
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import redirect, render
 from django.urls import reverse
+from django.views.decorators.http import require_POST
 
-from .forms import PostTestForm, PreTestForm, StudentLoginForm, StudentSignupForm
-from .models import FitnessTestEntry, StudentProfile
+from . import profiling
+from .forms import PostTestForm, PreTestForm, ProfilingForm, StudentLoginForm, StudentSignupForm
+from .fragments import get_fragments
+from .ingest import IngestTimeout
+from .leaderboards import LEADERBOARD_METRICS, get_leaderboard
+from .models import FitnessTestEntry, OutlierFlag, StudentProfile
 
 # Create your views here.
 
+INGEST_TIMEOUT_MESSAGE = (
+    "Saving your entry is taking longer than usual. Check your progress "
+    "below before submitting it again."
+)
+
+_auth_tables_ready = False
+
 
 def ensure_auth_tables():
-    """Run migrations lazily if the auth tables are missing."""
+    """
+    Run migrations lazily if the auth tables are missing. The probe only
+    runs until it succeeds once per process.
+    """
+
+    global _auth_tables_ready
+    if _auth_tables_ready:
+        return
 
     User = get_user_model()
     try:
         User.objects.exists()
     except OperationalError:
+        from django.core.management import call_command
+
         call_command("migrate", interactive=False, run_syncdb=True)
+    _auth_tables_ready = True
+
+
+def current_student_profile(request) -> StudentProfile:
+    """
+    Return the logged-in user's StudentProfile (cached by
+    CachedAuthenticationMiddleware) or raise Http404 if they have none.
+    """
+
+    profile = getattr(request, "student_profile", None)
+    if profile is None:
+        profile = StudentProfile.objects.filter(user=request.user).first()
+    if not profile:
+        raise Http404("No StudentProfile matches the given query.")
+    return profile
+
+
+def school_for_user(request):
+    """
+    The School served on this host, provided the logged-in user belongs to
+    it. Students only see their own school; staff without a profile may see
+    any. Raises PermissionDenied otherwise.
+    """
+
+    profile = getattr(request, "student_profile", None)
+    if profile is None:
+        profile = StudentProfile.objects.filter(user=request.user).first()
+    if profile:
+        if profile.school_id != request.school.pk:
+            raise PermissionDenied("This account belongs to another school.")
+    elif not request.user.is_staff:
+        raise PermissionDenied("No StudentProfile for this account.")
+    return request.school
 
 
 def dashboard(request):
@@ -123,7 +179,7 @@ def signup(request):
         login_form = StudentLoginForm()  # empty, for the login panel
 
         if signup_form.is_valid():
-            user, profile = signup_form.save()
+            user, profile = signup_form.save(school=getattr(request, "school", None))
             login(request, user)
             return redirect("pre_test_form")
     else:
@@ -145,7 +201,7 @@ def login_view(request):
     ensure_auth_tables()
 
     if request.method == "POST":
-        login_form = StudentLoginForm(request.POST)
+        login_form = StudentLoginForm(request.POST, request=request)
         signup_form = StudentSignupForm()  # empty, for the register panel
 
         if login_form.is_valid():
@@ -170,13 +226,22 @@ def personal_progress(request):
     return render(request, "personalprogress.html")
 
 
+@login_required
 def class_analytics(request):
-    return render(request, "classanalytics.html")
+    school = school_for_user(request)
+    section = request.GET.get("section") or None
+    names = ["section_summary", "leaderboards"]
+    if request.user.is_staff:
+        # Lists teachers' remarks about individual students.
+        names.append("recent_activity")
+    fragments = get_fragments(names, school.pk, section)
+    fragments.update(get_fragments(["section_options"], school.pk))
+    return render(request, "classanalytics.html", {"section": section, "fragments": fragments})
 
 
 @login_required
 def pre_test_form(request):
-    student_profile = get_object_or_404(StudentProfile, user=request.user)
+    student_profile = current_student_profile(request)
 
     active_tab = "post" if request.GET.get("tab") == "post" else "pre"
     force_new_post = request.GET.get("new") == "post"
@@ -221,15 +286,23 @@ def pre_test_form(request):
             post_form = PostTestForm(request.POST)
             pre_form = PreTestForm(initial=pre_initial)
             if post_form.is_valid():
-                post_form.save(student_profile)
-                messages.success(request, "New post-test entry saved successfully.")
+                try:
+                    post_form.save(student_profile)
+                except IngestTimeout:
+                    messages.error(request, INGEST_TIMEOUT_MESSAGE)
+                else:
+                    messages.success(request, "New post-test entry saved successfully.")
                 return redirect("student_progress")
         else:
             pre_form = PreTestForm(request.POST)
             post_form = PostTestForm(initial=post_initial)
             if pre_form.is_valid():
-                pre_form.save(student_profile)
-                messages.success(request, "Pre-test data saved successfully.")
+                try:
+                    pre_form.save(student_profile)
+                except IngestTimeout:
+                    messages.error(request, INGEST_TIMEOUT_MESSAGE)
+                else:
+                    messages.success(request, "Pre-test data saved successfully.")
                 return redirect("student_progress")
     else:
         pre_form = PreTestForm(initial=pre_initial)
@@ -255,13 +328,82 @@ def post_test_entry(request):
     return redirect(redirect_url)
 
 
+@login_required
+def leaderboard(request, metric):
+    """
+    Top students of the current school for one metric, school-wide or for
+    ?section=..., as JSON.
+    """
+
+    school = school_for_user(request)
+    if metric not in LEADERBOARD_METRICS:
+        raise Http404("Unknown metric.")
+    section = request.GET.get("section") or None
+    return JsonResponse(
+        {
+            "metric": metric,
+            "section": section,
+            "order": LEADERBOARD_METRICS[metric],
+            "rows": get_leaderboard(metric, school.pk, section),
+        }
+    )
+
+
+@staff_member_required
+def outlier_flags(request):
+    """
+    Test values of the current school flagged by core.screening, optionally
+    for ?section=..., as JSON for teachers to review.
+    """
+
+    flags = OutlierFlag.objects.for_school(request.school).select_related("entry__student")
+    section = request.GET.get("section")
+    if section:
+        flags = flags.filter(section=section)
+    return JsonResponse(
+        {
+            "section": section or None,
+            "rows": [
+                {
+                    "entry_id": flag.entry_id,
+                    "student_id": flag.entry.student_id,
+                    "name": flag.entry.student.full_name,
+                    "section": flag.section,
+                    "test_type": flag.entry.test_type,
+                    "metric": flag.metric,
+                    "value": flag.value,
+                    "median": flag.median,
+                    "score": round(flag.score, 2),
+                }
+                for flag in flags[:500]
+            ],
+        }
+    )
+
+
+@staff_member_required
 def student_management(request):
-    return render(request, "studentmanagement.html")
+    """
+    Roster of the current school, by name or by last activity. It lists
+    every student's BMI and VO₂ max, so only staff may see it.
+    """
+
+    school = school_for_user(request)
+    section = request.GET.get("section") or None
+    sort = "last_update" if request.GET.get("sort") == "last_update" else "name"
+    roster = "roster_by_activity" if sort == "last_update" else "roster"
+    fragments = get_fragments([roster], school.pk, section)
+    fragments.update(get_fragments(["section_options"], school.pk))
+    return render(
+        request,
+        "studentmanagement.html",
+        {"section": section, "sort": sort, "roster": fragments[roster], "fragments": fragments},
+    )
 
 
 @login_required
 def student_progress(request):
-    student_profile = get_object_or_404(StudentProfile, user=request.user)
+    student_profile = current_student_profile(request)
 
     test_entries = valid_test_entries(student_profile)
 
@@ -347,4 +489,58 @@ def view_student(request):
 
 def admin_page(request):
     # custom admin page (NOT Django’s /admin/ site)
-    return render(request, "admin.html")
+    context = {}
+    if request.user.is_staff:
+        context.update(profiling_context(request.GET.get("profile")))
+    return render(request, "admin.html", context)
+
+
+def profiling_context(selected=None, form=None):
+    """Profiling panel of the custom admin page (staff only)."""
+
+    sessions = profiling.list_sessions()
+    if selected is None and sessions:
+        selected = sessions[0]["id"]
+    report = None
+    if selected:
+        try:
+            report = profiling.session_report(selected)
+        except FileNotFoundError:
+            selected = None
+    return {
+        "profiling_form": form or ProfilingForm(),
+        "profiling_active": profiling.active_session(),
+        "profiling_sessions": sessions,
+        "profiling_selected": selected,
+        "profiling_report": report,
+    }
+
+
+@staff_member_required
+@require_POST
+def profiling_start(request):
+    form = ProfilingForm(request.POST)
+    if not form.is_valid():
+        return render(request, "admin.html", profiling_context(form=form))
+    profiling.start_session(form.cleaned_data["pattern"], form.cleaned_data["requests"], request.user)
+    messages.success(request, "Profiling started.")
+    return redirect("admin_page")
+
+
+@staff_member_required
+@require_POST
+def profiling_stop(request):
+    profiling.stop_session()
+    messages.success(request, "Profiling stopped.")
+    return redirect("admin_page")
+
+
+@staff_member_required
+def profiling_download(request, session_id):
+    try:
+        data = profiling.merged_stats_bytes(session_id)
+    except FileNotFoundError:
+        raise Http404("No profile with that id.")
+    response = HttpResponse(data, content_type="application/octet-stream")
+    response["Content-Disposition"] = f'attachment; filename="{session_id}.prof"'
+    return response
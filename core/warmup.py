@@ -0,0 +1,111 @@
+"""
+Warm-up for freshly started WSGI workers.
+
+config.wsgi calls warm_up() once the application is created (disable with
+FITNESS_WARMUP=0), so work that would otherwise land on a worker's first
+request happens at boot: importing the URLconf (views, admin), compiling
+every core template into the cached template loader, rendering the forms
+once, connecting the cache, probing the auth tables, and loading the static
+manifest and password hasher.
+
+Database connections opened here are closed again, so warming up in a
+pre-forking master (e.g. gunicorn --preload) does not leak a connection
+into the workers.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def load_urlconf():
+    from django.urls import get_resolver, reverse
+
+    get_resolver().url_patterns
+    # Builds the resolver's reverse lookup tables ({% url %} on every page).
+    reverse("dashboard")
+
+
+def compile_templates():
+    """Parse every template under core/templates (fragments/ too) into the cached loader."""
+
+    from django.template import engines
+
+    template_dir = Path(apps.get_app_config("core").path) / "templates"
+    names = sorted(path.relative_to(template_dir).as_posix() for path in template_dir.rglob("*.html"))
+    for engine in engines.all():
+        for name in names:
+            engine.get_template(name)
+
+
+def render_forms():
+    """Load the form widget templates used by the signup/login and test pages."""
+
+    from .forms import PreTestForm, StudentLoginForm, StudentSignupForm
+
+    for form_class in (StudentSignupForm, StudentLoginForm, PreTestForm):
+        str(form_class())
+
+
+def connect_cache():
+    from django.core.cache import cache
+
+    cache.get("core:warmup")
+
+
+def check_auth_tables():
+    from .views import ensure_auth_tables
+
+    ensure_auth_tables()
+
+
+def load_static_manifest():
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    getattr(staticfiles_storage, "hashed_files", None)
+
+
+def load_password_hasher():
+    from django.contrib.auth.hashers import get_hasher
+
+    get_hasher()
+
+
+STEPS = [
+    ("urlconf", load_urlconf),
+    ("templates", compile_templates),
+    ("forms", render_forms),
+    ("cache", connect_cache),
+    ("auth tables", check_auth_tables),
+    ("static manifest", load_static_manifest),
+    ("password hasher", load_password_hasher),
+]
+
+
+def warm_up() -> dict:
+    """Run every warm-up step and return their durations in milliseconds."""
+
+    timings = {}
+    try:
+        for name, step in STEPS:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                # A failed warm-up must never stop the worker from booting.
+                logger.exception("Warm-up step %r failed", name)
+            timings[name] = (time.perf_counter() - started) * 1000
+    finally:
+        connections.close_all()
+
+    logger.info(
+        "Worker warm-up finished in %.1f ms (%s)",
+        sum(timings.values()),
+        ", ".join(f"{name}: {ms:.1f} ms" for name, ms in timings.items()),
+    )
+    return timings